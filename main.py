@@ -4,7 +4,7 @@ import asyncio
 import json
 from datetime import datetime
 from src.cli_ai.core.ai_engine import think, reflexion, speak_text_openai, classify_intent
-from src.cli_ai.tools.executor import execute_tool
+from src.cli_ai.tools.executor import execute_tool, is_critical_action
 from src.cli_ai.tools.audio.speech_to_text import get_voice_input_whisper
 from src.cli_ai.utils.spinner import Spinner
 from src.cli_ai.utils.directory_manager import directory_manager
@@ -37,7 +37,7 @@ async def get_user_input(voice_input_enabled: bool) -> tuple[str, bool]:
 async def main():
     print(
         Fore.YELLOW
-        + "Autonomous Agent Started. Type '/voice' to toggle voice input, '/flush' to clear conversation, 'exit' to quit."
+        + "Autonomous Agent Started. Type '/voice' to toggle voice input, '/flush' to clear conversation, '/reset' to start fresh, 'exit' to quit."
     )
     spinner = Spinner("Thinking...")
     
@@ -65,7 +65,7 @@ async def main():
             continue
         if user_input.lower() == "/flush":
             # Extract user info from current session before flushing
-            current_messages = session_memory.recent_messages.copy()
+            current_messages = list(session_memory.recent_messages)
             if current_messages:
                 extracted_info = await user_info.extract_user_info_from_conversation(current_messages)
                 if extracted_info:
@@ -79,6 +79,20 @@ async def main():
             session_memory.message_count = 0
             print(Fore.YELLOW + "[Session Flushed] Conversation history forgotten. User preferences preserved.")
             continue
+        if user_input.lower() == "/reset":
+            # Start from a clean slate without any LLM calls, so a single long-lived
+            # process can be driven through many independent tasks
+            from src.cli_ai.core.prompts import reset_task_memory
+            from src.cli_ai.utils.database import flush_pending_index
+            
+            session_memory.recent_messages.clear()
+            session_memory.message_count = 0
+            session_memory.set_tool_execution_mode(False)
+            reset_task_memory()
+            # Between tasks is a quiet moment to persist what the last one added
+            flush_pending_index()
+            print(Fore.YELLOW + "[Session Reset] Conversation history and task memory cleared.")
+            continue
         intent = await classify_intent(user_input)
         if intent == "exit_program" or user_input.lower() == "exit":
             # Extract user info and save session to vector storage before exit
@@ -154,8 +168,7 @@ async def main():
                 if overflow_count % 2 != 0:
                     overflow_count += 1
                 
-                overflow_messages = session_memory.recent_messages[:overflow_count]
-                session_memory.recent_messages = session_memory.recent_messages[overflow_count:]
+                overflow_messages = session_memory.pop_oldest(overflow_count)
                 
                 if overflow_messages:
                     # Extract user info before storing in vector database
@@ -184,7 +197,7 @@ async def main():
             
             while True:
                 # Check if action is marked as critical and requires user confirmation
-                if action.get("is_critical", False):
+                if is_critical_action(action["tool"], action["args"], action.get("is_critical", False)):
                     # print(f"Tool: {action['tool']}")
                     # print(f"Args: {action['args']}")
                     print(Fore.CYAN + f"Thought: {action['thought']}")
@@ -1,21 +1,37 @@
 
 import json
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from sentence_transformers import SentenceTransformer
 from ..utils import database as db
+from ..utils.embeddings import EmbeddingCache, get_embedding_device
 
-MODEL = SentenceTransformer('all-MiniLM-L6-v2')
+MODEL_NAME = 'all-MiniLM-L6-v2'
+# Encoded vectors come back as numpy arrays on the CPU, where FAISS runs
+MODEL = SentenceTransformer(MODEL_NAME, device=get_embedding_device())
+EMBEDDING_CACHE = EmbeddingCache(MODEL_NAME)
 
+@lru_cache(maxsize=4096)
 def _generate_embedding(text: str) -> bytes:
-    """Generates a vector embedding for a given text."""
-    embedding = MODEL.encode(text)
-    return embedding.tobytes()
+    """Generates a vector embedding for a given text, reusing cached embeddings across runs."""
+    return EMBEDDING_CACHE.get_or_compute(text, lambda t: MODEL.encode(t).tobytes())
 
 def save_memory(content: str, metadata: Optional[Dict[str, Any]] = None):
     """Saves a memory to the system."""
     embedding = _generate_embedding(content)
     db.save_memory(content, embedding, metadata)
 
+def save_memories_batch(contents: List[str], metadatas: Optional[List[Optional[Dict[str, Any]]]] = None):
+    """Saves several memories, encoding every text not already cached in a single batched forward pass."""
+    embeddings = [EMBEDDING_CACHE.get(content) for content in contents]
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        encoded = MODEL.encode([contents[i] for i in missing], batch_size=32, convert_to_numpy=True)
+        for i, vector in zip(missing, encoded):
+            embeddings[i] = vector.tobytes()
+            EMBEDDING_CACHE.put(contents[i], embeddings[i])
+    db.save_memories(contents, embeddings, metadatas)
+
 def recall_memories(query: str, limit: int = 10) -> List[Dict[str, Any]]:
     """Recalls memories from the system based on a query."""
     query_embedding = _generate_embedding(query)
@@ -21,6 +21,14 @@ openai_api_key = os.getenv("OPENAI_API_KEY")
 
 client = None
 
+# Observation substrings that mean the last tool call itself was malformed.
+# Built once instead of on every history message scanned by reflexion.
+_TOOL_ERROR_MARKERS = (
+    "Unknown tool", "unknown tool", "Unknown argument", "unknown argument",
+    "Missing required parameter", "Invalid parameter", "Tool not found",
+    "Tool execution failed", "tool execution failed"
+)
+
 def get_client():
     """Get or create the OpenAI client."""
     global client
@@ -264,22 +272,14 @@ async def reflexion(history: list, current_goal: str, original_user_request: str
             # Check if this is a dictionary with observation field (new format)
             if isinstance(msg_content, dict) and 'observation' in msg_content:
                 observation_text = str(msg_content['observation'])
-                if any(error in observation_text for error in [
-                    "Unknown tool", "unknown tool", "Unknown argument", "unknown argument",
-                    "Missing required parameter", "Invalid parameter", "Tool not found",
-                    "Tool execution failed", "tool execution failed"
-                ]):
+                if any(error in observation_text for error in _TOOL_ERROR_MARKERS):
                     tool_error_detected = True
                     last_observation = observation_text
                 break
             # Also check for old format with "Observation:" string
             elif isinstance(msg_content, str) and "Observation:" in msg_content:
                 observation_text = msg_content
-                if any(error in observation_text for error in [
-                    "Unknown tool", "unknown tool", "Unknown argument", "unknown argument",
-                    "Missing required parameter", "Invalid parameter", "Tool not found",
-                    "Tool execution failed", "tool execution failed"
-                ]):
+                if any(error in observation_text for error in _TOOL_ERROR_MARKERS):
                     tool_error_detected = True
                     last_observation = observation_text
                 break
@@ -1,6 +1,9 @@
 import json
 from typing import List, Dict, Any, Optional
-from ..tools.tools import tools_schema, get_tool_docstrings
+from ..tools.tools import get_tools_schema_json, get_tool_docstrings
+
+# The schema is static for the process lifetime; serialized once by the tools module
+_TOOLS_SCHEMA_SERIALIZED = get_tools_schema_json()
 
 
 # Task memory for preventing redundant actions within a task
@@ -49,48 +52,49 @@ def get_task_context_string() -> str:
     if not _current_task_memory["actions_taken"]:
         return "No active task - ready to start new work."
     
-    context = f"🎯 ACTIVE TASK: {_current_task_memory['original_request']}\n"
-    context += f"📊 PROGRESS: {len(_current_task_memory['actions_taken'])} actions completed\n"
+    # Collect lines and join once instead of re-copying the string on every append
+    lines = [f"🎯 ACTIVE TASK: {_current_task_memory['original_request']}\n",
+             f"📊 PROGRESS: {len(_current_task_memory['actions_taken'])} actions completed\n"]
     
     # Show accumulated knowledge in a more structured way
     if _current_task_memory["knowledge"]:
-        context += "\n💡 KNOWLEDGE ACCUMULATED:\n"
+        lines.append("\n💡 KNOWLEDGE ACCUMULATED:\n")
         for key, value in _current_task_memory["knowledge"].items():
             # Format the knowledge better for decision making
             if "files_in_" in key:
                 path = key.replace("files_in_", "")
-                context += f"  📁 Directory {path}: {len(value) if isinstance(value, list) else '?'} files found\n"
+                lines.append(f"  📁 Directory {path}: {len(value) if isinstance(value, list) else '?'} files found\n")
             elif "similarity_cluster_" in key:
                 cluster_name = key.split('/')[-1] if '/' in key else key.replace('similarity_cluster_', '')
                 cluster_size = len(value) if isinstance(value, list) else 1
-                context += f"  🔗 Cluster {cluster_name}: {cluster_size} similar images\n"
+                lines.append(f"  🔗 Cluster {cluster_name}: {cluster_size} similar images\n")
             elif "remaining_unclustered_files" in key:
                 remaining_count = len(value) if isinstance(value, list) else value
-                context += f"  ⏳ Unclustered files: {remaining_count} remaining\n"
+                lines.append(f"  ⏳ Unclustered files: {remaining_count} remaining\n")
             elif "image_analysis_" in key:
                 image_name = key.split('/')[-1] if '/' in key else key.replace('image_analysis_', '')
-                context += f"  🖼️  {image_name}: {str(value)[:150]}{'...' if len(str(value)) > 150 else ''}\n"
+                lines.append(f"  🖼️  {image_name}: {str(value)[:150]}{'...' if len(str(value)) > 150 else ''}\n")
             elif "species_" in key:
                 image_name = key.split('/')[-1] if '/' in key else key.replace('species_', '')
-                context += f"  🏷️  {image_name} → Species: {value}\n"
+                lines.append(f"  🏷️  {image_name} → Species: {value}\n")
             elif "cluster_size_" in key:
                 continue  # Skip, already shown in similarity_cluster_
             else:
-                context += f"  ℹ️  {key}: {str(value)[:100]}{'...' if len(str(value)) > 100 else ''}\n"
+                lines.append(f"  ℹ️  {key}: {str(value)[:100]}{'...' if len(str(value)) > 100 else ''}\n")
     
     # Show recent actions to prevent redundancy with better formatting
     recent_actions = _current_task_memory["actions_taken"][-5:] if _current_task_memory["actions_taken"] else []
     if recent_actions:
-        context += f"\n📝 RECENT ACTIONS (avoid repeating):\n"
+        lines.append(f"\n📝 RECENT ACTIONS (avoid repeating):\n")
         for i, action in enumerate(recent_actions, 1):
             status = "✅" if action.get("result", {}).get("status") == "Success" else "❌"
             args_summary = str(action['args']).replace('/Users/kimboyoon/Desktop/multimodal-cli-agent/', '').replace('{"path": "', '').replace('"}', '')[:50]
-            context += f"  {status} {action['tool']}({args_summary}) → {action.get('result', {}).get('status', 'pending')}\n"
+            lines.append(f"  {status} {action['tool']}({args_summary}) → {action.get('result', {}).get('status', 'pending')}\n")
     
     # Add guidance for next steps
-    context += "\n⚡ TASK CONTINUATION: Build on knowledge above - continue where you left off!"
+    lines.append("\n⚡ TASK CONTINUATION: Build on knowledge above - continue where you left off!")
     
-    return context
+    return "".join(lines)
 
 
 def has_performed_action(tool: str, args: dict = None) -> bool:
@@ -169,7 +173,8 @@ You have two choices for the top-level key in the JSON response:
         *   **"is_critical"**: (REQUIRED) A boolean field that determines if user confirmation is needed before execution.
             **Determining `is_critical`:**
             *   `write_file`: Always `true`.
-            *   `run_shell_command`: `true` if the command modifies the system or data (e.g., `rm`, `sudo`, `mv`, `delete`, `format`, `kill`, `reboot`, `shutdown`, `apt remove`, `npm uninstall`, `pip uninstall`, `git commit`, `git push`). Otherwise, `false` (e.g., `ls`, `pwd`, `echo`, `git status`, `git log`).
+            *   `run_shell_command`: `true` if the command modifies the system or data (e.g., `rm`, `sudo`, `mv`, `delete`, `format`, `kill`, `reboot`, `shutdown`, `apt remove`, `npm uninstall`, `pip uninstall`, `git commit`, `git push`). Also `true` for any command using shell syntax (`;`, `&&`, `|`, `$(...)`, backticks, redirection). Otherwise, `false` (e.g., `ls`, `pwd`, `echo`, `git status`, `git log`).
+            *   `batch`: `true` if any call in `calls` is `write_file` or a `run_shell_command`. Otherwise, `false`.
             *   All other tools (`read_file`, `list_directory`, `describe_image`, `find_similar_images`): Always `false`.
 
     **CRITICAL: IMAGE SORTING BY SPECIES WORKFLOW**
@@ -254,7 +259,7 @@ You have two choices for the top-level key in the JSON response:
     })}
 
 **Available Tools:**
-{json.dumps(tools_schema, indent=2)}
+{_TOOLS_SCHEMA_SERIALIZED}
 
 **CRITICAL: Use ONLY the tools listed above. For images use 'describe_image' and 'find_similar_images'.**
 
@@ -332,7 +337,8 @@ If the original user request has been fully addressed and completed, you MUST re
         *   **"args"**: The arguments for the tool.
         *   **"is_critical"**: Risk assessment:
             *   `write_file`: Always `true`.
-            *   `run_shell_command`: `true` if the command modifies the system or data (e.g., `rm`, `sudo`, `mv`, `delete`, `format`, `kill`, `reboot`, `shutdown`, `apt remove`, `npm uninstall`, `pip uninstall`, `git commit`, `git push`). Otherwise, `false` (e.g., `ls`, `pwd`, `echo`, `git status`, `git log`).
+            *   `run_shell_command`: `true` if the command modifies the system or data (e.g., `rm`, `sudo`, `mv`, `delete`, `format`, `kill`, `reboot`, `shutdown`, `apt remove`, `npm uninstall`, `pip uninstall`, `git commit`, `git push`). Also `true` for any command using shell syntax (`;`, `&&`, `|`, `$(...)`, backticks, redirection). Otherwise, `false` (e.g., `ls`, `pwd`, `echo`, `git status`, `git log`).
+            *   `batch`: `true` if any call in `calls` is `write_file` or a `run_shell_command`. Otherwise, `false`.
             *   All other tools (`read_file`, `list_directory`, `describe_image`, `find_similar_images`): Always `false`.
 
 **Make goals SPECIFIC and PROGRESSIVE:**
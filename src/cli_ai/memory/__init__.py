@@ -10,10 +10,10 @@ This hybrid architecture maintains recent context while providing semantic searc
 capabilities and intelligent user profile building from natural conversation.
 """
 
-from .session_manager import SessionMemoryManager
+from .session_manager import Message, SessionMemoryManager
 from .vector_manager import VectorMemoryManager
 from .userinfo_manager import UserInfoManager
 
-__all__ = ["SessionMemoryManager", "VectorMemoryManager", "UserInfoManager"]
+__all__ = ["Message", "SessionMemoryManager", "VectorMemoryManager", "UserInfoManager"]
 
 __version__ = "2.0.0"
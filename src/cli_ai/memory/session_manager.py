@@ -6,10 +6,51 @@ This module replaces the unlimited history growth with a bounded session memory
 that maintains the last N messages and handles overflow to vector storage.
 """
 
+from collections import deque
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Deque, List, Dict, Any, Optional, Tuple
 import json
 
+# Longest tool observation kept in a session message. Everything stored here is re-sent
+# to the LLM every turn and later embedded, so a multi-megabyte command output is cut
+# down once instead of being carried around whole.
+MAX_OBSERVATION_CHARS = 64 * 1024
+
+
+class Message:
+    """
+    Lightweight conversation message for building large message lists.
+    
+    Slotted instead of a per-message dict, but readable the same way
+    (msg["role"], msg.get("session_id")) so it can be passed anywhere a
+    message dict is accepted.
+    """
+    __slots__ = ("role", "content", "timestamp", "session_id")
+    
+    def __init__(self, role: str, content: Any, timestamp: Optional[datetime] = None, session_id: Optional[str] = None):
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp if timestamp is not None else datetime.now()
+        self.session_id = session_id
+    
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self.__slots__ else default
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the message dict format used by SessionMemoryManager."""
+        return {key: getattr(self, key) for key in self.__slots__}
+    
+    def __repr__(self) -> str:
+        return f"Message(role={self.role!r}, content={self.content!r}, session_id={self.session_id!r})"
+
 
 class SessionMemoryManager:
     """Manages recent conversation history with bounded memory and overflow handling."""
@@ -21,7 +62,8 @@ class SessionMemoryManager:
         Args:
             max_recent_length: Maximum number of recent messages to keep in memory
         """
-        self.recent_messages: List[Dict[str, Any]] = []
+        # Deque so overflow drains from the front in O(1) instead of re-slicing the list
+        self.recent_messages: Deque[Dict[str, Any]] = deque()
         self.max_recent_length = max_recent_length
         self.session_id = self._generate_session_id()
         self.message_count = 0
@@ -31,6 +73,11 @@ class SessionMemoryManager:
         """Generate unique session ID."""
         return f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     
+    def pop_oldest(self, count: int) -> List[Dict[str, Any]]:
+        """Remove and return up to `count` of the oldest recent messages."""
+        count = min(count, len(self.recent_messages))
+        return [self.recent_messages.popleft() for _ in range(count)]
+    
     def set_tool_execution_mode(self, enabled: bool) -> None:
         """Enable or disable tool execution mode to prevent overflow during active tool use."""
         self.tool_execution_mode = enabled
@@ -96,11 +143,8 @@ class SessionMemoryManager:
             # Don't overflow more than available messages
             overflow_count = min(overflow_count, len(self.recent_messages))
             
-            # Extract overflow messages (oldest pairs)
-            overflow_messages = self.recent_messages[:overflow_count]
-            
-            # Keep only recent messages
-            self.recent_messages = self.recent_messages[overflow_count:]
+            # Extract overflow messages (oldest pairs), keeping only recent messages
+            overflow_messages = self.pop_oldest(overflow_count)
             
             print(f"[Smart Memory] Overflow: {overflow_count} messages ({overflow_count//2} conversation pairs) moved to vector storage")
             
@@ -152,8 +196,7 @@ class SessionMemoryManager:
                     overflow_count = 2  # Overflow a pair
                 # If not, just overflow the single message
                 
-            overflow_messages = self.recent_messages[:overflow_count]
-            self.recent_messages = self.recent_messages[overflow_count:]
+            overflow_messages = self.pop_oldest(overflow_count)
             
             pair_count = overflow_count // 2
             single_count = overflow_count % 2
@@ -229,8 +272,7 @@ class SessionMemoryManager:
             if overflow_count % 2 != 0 and len(self.recent_messages) > overflow_count:
                 overflow_count += 1
             
-            overflow_messages = self.recent_messages[:overflow_count]
-            self.recent_messages = self.recent_messages[overflow_count:]
+            overflow_messages = self.pop_oldest(overflow_count)
             
             pair_count = overflow_count // 2
             single_count = overflow_count % 2
@@ -259,14 +301,14 @@ class SessionMemoryManager:
         # If overflow ends with a user message (no assistant response), move it back
         if overflow_messages[-1]["role"] == "user":
             orphaned_message = overflow_messages.pop()
-            self.recent_messages.insert(0, orphaned_message)
+            self.recent_messages.appendleft(orphaned_message)
             print(f"[Smart Memory] Moved orphaned user message back to recent memory")
             
         return overflow_messages
     
     def get_recent_messages(self) -> List[Dict[str, Any]]:
         """Get all recent messages in chronological order."""
-        return self.recent_messages.copy()
+        return list(self.recent_messages)
     
     def get_recent_messages_for_ai(self) -> List[Dict[str, Any]]:
         """
@@ -299,7 +341,10 @@ class SessionMemoryManager:
         Converts complex action data to readable conversation format.
         """
         # Format action response as readable content
-        action_content = f"Thought: {thought}\nAction: {action}({args})\nResult: {observation}"
+        result = str(observation)
+        if len(result) > MAX_OBSERVATION_CHARS:
+            result = f"{result[:MAX_OBSERVATION_CHARS]}\n...[observation truncated, {len(result)} characters in total]"
+        action_content = f"Thought: {thought}\nAction: {action}({args})\nResult: {result}"
         
         return self.add_exchange(user_request, action_content, metadata)
     
@@ -337,8 +382,8 @@ class SessionMemoryManager:
         Clear current session and return all messages for storage.
         Useful for session end or manual reset.
         """
-        all_messages = self.recent_messages.copy()
-        self.recent_messages = []
+        all_messages = list(self.recent_messages)
+        self.recent_messages = deque()
         self.session_id = self._generate_session_id()
         self.message_count = 0
         
@@ -349,8 +394,12 @@ class SessionMemoryManager:
         Format conversation messages for vector storage.
         Creates a readable conversation format for semantic search.
         """
-        conversation_text = f"Session: {self.session_id}\n"
-        conversation_text += f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        # Collect lines and join once; overflow chunks can carry large tool output
+        lines = [
+            f"Session: {self.session_id}",
+            f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            ""
+        ]
         
         for msg in messages:
             role = msg["role"].title()
@@ -366,9 +415,9 @@ class SessionMemoryManager:
                 else:
                     content = str(content)
             
-            conversation_text += f"[{timestamp}] {role}: {content}\n"
+            lines.append(f"[{timestamp}] {role}: {content}")
         
-        return conversation_text
+        return "\n".join(lines) + "\n"
     
     def debug_info(self) -> Dict[str, Any]:
         """Get debug information about memory state."""
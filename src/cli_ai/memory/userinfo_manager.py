@@ -4,6 +4,8 @@ UserInfo Manager - Automatic extraction and management of user information.
 Replaces manual save_memory function with intelligent conversation analysis.
 """
 
+import asyncio
+import hashlib
 import json
 import sqlite3
 import re
@@ -16,6 +18,32 @@ import os
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# User lines in conversations formatted for vector storage; compiled once at import
+_USER_LINE_RE = re.compile(r'\[[\d:]+\] User: (.+?)(?=\n\[[\d:]+\] Assistant:|\n\n|$)', re.DOTALL)
+
+# Model used for extraction; part of the extraction cache key
+EXTRACTION_MODEL = "gpt-4o-mini"
+
+# Cached extractions expire so a poor reply is eventually retried, and the table is
+# capped so it cannot grow by one row per analysed message forever
+EXTRACTION_CACHE_MAX_ROWS = 2000
+EXTRACTION_CACHE_MAX_AGE_DAYS = 30
+
+# Shared extraction client, created on first use and reused for every message
+_client = None
+
+def _get_client():
+    """Get or create the OpenAI client used for user info extraction."""
+    global _client
+    if _client is None:
+        # Imported here to keep the openai/dotenv import off the module import path
+        from openai import AsyncOpenAI
+        from dotenv import load_dotenv
+        
+        load_dotenv()
+        _client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
 @dataclass
 class UserInfo:
     """Structured user information data class."""
@@ -33,8 +61,9 @@ class UserInfoManager:
     Replaces manual save_memory with intelligent conversation analysis.
     """
     
-    def __init__(self, db_path: str = "agent_memory.db"):
-        self.db_path = db_path
+    def __init__(self, db_path: Optional[str] = None):
+        # Share the memory database (honors CLI_AI_DB) unless a path is given
+        self.db_path = db_path or os.getenv("CLI_AI_DB", "agent_memory.db")
         self.init_user_info_table()
         
     def init_user_info_table(self):
@@ -57,6 +86,20 @@ class UserInfoManager:
             )
         """)
         
+        # Remembers the extractions for an already analysed prompt to skip repeat LLM
+        # calls; rows expire after EXTRACTION_CACHE_MAX_AGE_DAYS and are capped in number
+        c.execute("""
+            CREATE TABLE IF NOT EXISTS user_info_extraction_cache (
+                prompt_hash TEXT PRIMARY KEY,
+                extractions TEXT NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        c.execute("""
+            CREATE INDEX IF NOT EXISTS idx_user_info_extraction_cache_created_at
+            ON user_info_extraction_cache (created_at)
+        """)
+        
         conn.commit()
         conn.close()
         
@@ -85,6 +128,30 @@ class UserInfoManager:
                 
         return extracted_info
     
+    async def extract_user_info_batch(self, conversations: List[List[Dict[str, Any]]]) -> List[List[UserInfo]]:
+        """
+        Extract user information from several conversations in a single pass.
+        The user messages of every conversation are analyzed concurrently.
+        
+        Args:
+            conversations: List of message lists
+            
+        Returns:
+            One list of extracted UserInfo objects per input conversation, in order
+        """
+        owners = []
+        analyses = []
+        for conversation_index, messages in enumerate(conversations):
+            for msg in messages:
+                if msg.get('role') == 'user':
+                    owners.append(conversation_index)
+                    analyses.append(self._analyze_user_content(msg.get('content', ''), msg.get('session_id', 'unknown')))
+        
+        results: List[List[UserInfo]] = [[] for _ in conversations]
+        for conversation_index, info_items in zip(owners, await asyncio.gather(*analyses)):
+            results[conversation_index].extend(info_items)
+        return results
+    
     async def _analyze_user_content(self, content: str, source_session_id: str = None) -> List[UserInfo]:
         """
         Analyze user message content for personal information using LLM.
@@ -131,28 +198,30 @@ Guidelines:
 Return empty extractions array if no clear user info found."""
 
         try:
-            # Import the AI client here to avoid circular imports
-            import sys
-            import os
-            sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-            from openai import AsyncOpenAI
-            from dotenv import load_dotenv
-            
-            load_dotenv()
-            client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            prompt_hash = hashlib.sha256(f"{EXTRACTION_MODEL}\0{extraction_prompt}".encode("utf-8")).hexdigest()
+            extractions = self._get_cached_extractions(prompt_hash)
             
-            response = await client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert information extraction system. Return only valid JSON."},
-                    {"role": "user", "content": extraction_prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.1  # Low temperature for consistent extraction
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            extractions = result.get("extractions", [])
+            if extractions is None:
+                response = await _get_client().chat.completions.create(
+                    model=EXTRACTION_MODEL,
+                    messages=[
+                        {"role": "system", "content": "You are an expert information extraction system. Return only valid JSON."},
+                        {"role": "user", "content": extraction_prompt}
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.0
+                )
+                
+                result = json.loads(response.choices[0].message.content)
+                extractions = result.get("extractions", [])
+                # Temperature 0 is not fully deterministic; an empty reply may be a miss,
+                # so only usable extractions are cached and the rest are asked again
+                valid = [
+                    extraction for extraction in extractions
+                    if isinstance(extraction, dict) and all(key in extraction for key in ["category", "key", "value", "confidence"])
+                ]
+                if valid:
+                    self._cache_extractions(prompt_hash, valid)
             
             # Convert to UserInfo objects
             extracted_info = []
@@ -178,6 +247,39 @@ Return empty extractions array if no clear user info found."""
             # Fallback to empty list - don't break the system
             return []
 
+    def _get_cached_extractions(self, prompt_hash: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached raw extractions for a prompt hash, or None on a miss."""
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute("""
+            SELECT extractions FROM user_info_extraction_cache
+            WHERE prompt_hash = ? AND created_at >= datetime('now', ?)
+        """, (prompt_hash, f"-{EXTRACTION_CACHE_MAX_AGE_DAYS} days"))
+        row = c.fetchone()
+        conn.close()
+        return json.loads(row[0]) if row else None
+    
+    def _cache_extractions(self, prompt_hash: str, extractions: List[Dict[str, Any]]):
+        """Remember the extractions returned for a prompt hash, pruning expired and excess rows."""
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute("""
+            INSERT OR REPLACE INTO user_info_extraction_cache (prompt_hash, extractions, created_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+        """, (prompt_hash, json.dumps(extractions)))
+        c.execute(
+            "DELETE FROM user_info_extraction_cache WHERE created_at < datetime('now', ?)",
+            (f"-{EXTRACTION_CACHE_MAX_AGE_DAYS} days",)
+        )
+        c.execute("""
+            DELETE FROM user_info_extraction_cache WHERE rowid IN (
+                SELECT rowid FROM user_info_extraction_cache
+                ORDER BY created_at DESC, rowid DESC LIMIT -1 OFFSET ?
+            )
+        """, (EXTRACTION_CACHE_MAX_ROWS,))
+        conn.commit()
+        conn.close()
+
     def store_user_info(self, user_info_list: List[UserInfo]) -> int:
         """
         Store extracted user information in database.
@@ -368,8 +470,7 @@ Return empty extractions array if no clear user info found."""
         messages = []
         
         # Simple regex to extract user messages from formatted conversation
-        user_pattern = r'\[[\d:]+\] User: (.+?)(?=\n\[[\d:]+\] Assistant:|\n\n|$)'
-        user_matches = re.findall(user_pattern, content, re.DOTALL)
+        user_matches = _USER_LINE_RE.findall(content)
         
         for match in user_matches:
             messages.append({
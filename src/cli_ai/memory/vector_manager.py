@@ -4,14 +4,29 @@ Handles overflow storage and RAG retrieval using existing FAISS infrastructure
 """
 
 import json
+import time
 import numpy as np
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from sentence_transformers import SentenceTransformer
 from ..utils import database as db
+from ..utils.embeddings import EmbeddingCache, get_embedding_device
 
 # Use the same model as the existing system for consistency
-MODEL = SentenceTransformer('all-MiniLM-L6-v2')
+MODEL_NAME = 'all-MiniLM-L6-v2'
+# Encoded vectors come back as numpy arrays on the CPU, where FAISS runs
+MODEL = SentenceTransformer(MODEL_NAME, device=get_embedding_device())
+EMBEDDING_CACHE = EmbeddingCache(MODEL_NAME)
+
+
+@lru_cache(maxsize=4096)
+def _encode_text(text: str) -> bytes:
+    """
+    Encode text once per distinct string. Repeated queries reuse the in-process
+    bytes, and strings seen in earlier runs come from the on-disk cache.
+    """
+    return EMBEDDING_CACHE.get_or_compute(text, lambda t: MODEL.encode(t).tobytes())
 
 
 class VectorMemoryManager:
@@ -28,8 +43,14 @@ class VectorMemoryManager:
         
     def _generate_embedding(self, text: str) -> bytes:
         """Generate vector embedding for text content."""
-        embedding = self.model.encode(text)
-        return embedding.tobytes()
+        return _encode_text(text)
+    
+    def embed(self, text: str) -> bytes:
+        """
+        Embed a query once so it can be shared by every lookup in the same turn.
+        Pass the result to search_relevant_context(embedding=...).
+        """
+        return self._generate_embedding(text)
     
     def store_conversation_chunk(
         self, 
@@ -69,8 +90,12 @@ class VectorMemoryManager:
             # Generate embedding
             embedding = self._generate_embedding(conversation_text)
             
-            # Store in database using existing infrastructure
-            db.save_memory(conversation_text, embedding, chunk_metadata)
+            # Store in database using existing infrastructure, dated by the conversation's
+            # last message so recency ranking reflects when it was said, not when it overflowed
+            db.save_memory(
+                conversation_text, embedding, chunk_metadata,
+                timestamp=messages[-1].get("timestamp") if messages else None
+            )
             
             return True
             
@@ -83,7 +108,8 @@ class VectorMemoryManager:
         query: str, 
         limit: int = 3,
         min_similarity: float = 0.6,
-        temporal_weight: float = 0.3
+        temporal_weight: float = 0.3,
+        embedding: Optional[bytes] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for relevant past conversations using semantic similarity with temporal precedence.
@@ -94,62 +120,57 @@ class VectorMemoryManager:
             limit: Maximum number of results to return
             min_similarity: Minimum similarity threshold (0-1)
             temporal_weight: Weight given to recency (0-1, higher = more temporal bias)
+            embedding: Precomputed query embedding (from embed()); skips re-encoding the query
             
         Returns:
             List of relevant conversation contexts, prioritized by recency
         """
         try:
-            # Generate query embedding
-            query_embedding = self._generate_embedding(query)
+            # Generate query embedding unless the caller already has one
+            query_embedding = embedding if embedding is not None else self._generate_embedding(query)
             
-            # Search using existing recall system
-            raw_results = db.recall_memories(query_embedding, limit * 3)  # Get extra to apply temporal weighting
+            # Get extra candidates to apply temporal weighting
+            memory_ids, base_similarity, timestamps = db.search_memory_vectors(query_embedding, limit * 3)
+            if not memory_ids:
+                return []
             
-            # Filter and format results with temporal precedence
-            relevant_results = []
-            now = datetime.now()
+            # Score every candidate at once: cosine similarity plus an exponential
+            # recency boost that decays over days
+            hours_ago = np.maximum(time.time() - timestamps, 0.0) / 3600.0
+            temporal_boost = temporal_weight * np.power(0.9, hours_ago / 24.0)
+            final_similarity = base_similarity + temporal_boost
+            
+            # Highest score first - newer content wins ties
+            order = np.lexsort((-temporal_boost, -final_similarity))
+            candidates = [i for i in order if final_similarity[i] >= min_similarity]
+            
+            # Only materialize rows for candidates that survived scoring
+            rows = db.get_memories_by_ids([memory_ids[i] for i in candidates])
             
-            for result in raw_results:
-                # Parse metadata
-                metadata = json.loads(result.get('metadata', '{}')) if result.get('metadata') else {}
+            relevant_results = []
+            for i in candidates:
+                result = rows.get(memory_ids[i])
+                if result is None:
+                    continue
+                metadata = json.loads(result['metadata']) if result.get('metadata') else {}
                 
                 # Only include conversation chunks (not individual memories)
-                if metadata.get('type') == 'conversation_chunk':
-                    
-                    # Calculate base similarity score (placeholder - could enhance with actual cosine similarity)
-                    base_similarity = 0.8  # Placeholder
-                    
-                    # Apply temporal weighting - newer conversations get higher scores
-                    temporal_boost = 0
-                    try:
-                        timestamp_str = result.get('timestamp', '')
-                        if timestamp_str:
-                            result_time = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-                            # Calculate hours since the conversation
-                            hours_ago = (now - result_time).total_seconds() / 3600
-                            # Apply exponential decay: more recent = higher weight
-                            temporal_boost = temporal_weight * (0.9 ** (hours_ago / 24))  # Decay over days
-                    except Exception as time_error:
-                        print(f"[Vector Memory] Error parsing timestamp: {time_error}")
-                    
-                    final_similarity = base_similarity + temporal_boost
-                    
-                    if final_similarity >= min_similarity:
-                        formatted_result = {
-                            "content": result['content'],
-                            "similarity_score": final_similarity,
-                            "base_similarity": base_similarity,
-                            "temporal_boost": temporal_boost,
-                            "metadata": metadata,
-                            "timestamp": result.get('timestamp'),
-                            "id": result.get('id')
-                        }
-                        relevant_results.append(formatted_result)
-            
-            # Sort by final similarity score (semantic + temporal) - newer content wins ties
-            relevant_results.sort(key=lambda x: (x['similarity_score'], x['temporal_boost']), reverse=True)
+                if metadata.get('type') != 'conversation_chunk':
+                    continue
+                
+                relevant_results.append({
+                    "content": result['content'],
+                    "similarity_score": float(final_similarity[i]),
+                    "base_similarity": float(base_similarity[i]),
+                    "temporal_boost": float(temporal_boost[i]),
+                    "metadata": metadata,
+                    "timestamp": result.get('timestamp'),
+                    "id": result.get('id')
+                })
+                if len(relevant_results) == limit:
+                    break
             
-            return relevant_results[:limit]
+            return relevant_results
             
         except Exception as e:
             print(f"[Vector Memory] Error searching context: {e}")
@@ -57,7 +57,7 @@ def get_voice_input_whisper(samplerate=16000) -> Optional[str]:
 
                 if speech_prob > VAD_THRESHOLD:
                     if not is_recording:
-                        spinner = Spinner("Starting recording...")
+                        spinner = Spinner("Starting recording...", threaded=True)
                         spinner.start()
                         is_recording = True
                         recorded_chunks.extend(pre_speech_buffer)  # Add pre-speech buffer to recorded chunks
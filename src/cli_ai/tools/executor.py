@@ -4,11 +4,58 @@ import shlex
 import json
 import os
 from colorama import Fore
-from .tools import available_tools
+from .tools import available_tools, needs_shell
 from ..utils.spinner import Spinner
 from ..utils.directory_manager import directory_manager
 
+# Tool arguments that name a file or directory; relative values are resolved against the
+# agent's working directory (which only changes on `cd`) rather than the process cwd
+_PATH_ARGS = ("file_path", "path", "image_path", "search_directory")
+
+# Tools that can modify files or the system; a batch containing any of them needs the
+# same user confirmation as calling the tool on its own
+_CRITICAL_TOOLS = frozenset({"write_file", "run_shell_command"})
+
+def is_critical_action(tool_name: str, tool_args: dict, is_critical: bool = False) -> bool:
+    """
+    Whether an action needs user confirmation. Rather than trusting the model's flag alone,
+    this looks inside batches, and treats any command that would run through /bin/sh
+    (pipes, `;`, `&&`, `$(...)`, redirection...) as critical.
+    """
+    if is_critical:
+        return True
+    if tool_name == "run_shell_command":
+        return needs_shell((tool_args or {}).get("command"))
+    if tool_name == "batch":
+        calls = (tool_args or {}).get("calls")
+        return isinstance(calls, list) and any(
+            isinstance(call, dict) and call.get("name") in _CRITICAL_TOOLS for call in calls
+        )
+    return False
+
+async def _execute_batch(calls: list) -> dict:
+    """Run independent tool calls concurrently and report each one's result in order."""
+    if not isinstance(calls, list) or not calls:
+        return {"tool name": "batch", "status": "Error", "output": "'calls' must be a non-empty list."}
+    if any(not isinstance(call, dict) or call.get("name") == "batch" for call in calls):
+        return {"tool name": "batch", "status": "Error", "output": "Each call must be an object naming a tool other than 'batch'."}
+    
+    results = await asyncio.gather(
+        *(execute_tool(call.get("name", ""), dict(call.get("args") or {})) for call in calls),
+        return_exceptions=True
+    )
+    results = [
+        {"tool name": call.get("name", ""), "status": "Error", "output": f"Tool execution failed: {result}"}
+        if isinstance(result, BaseException) else result
+        for call, result in zip(calls, results)
+    ]
+    status = "Success" if all(result["status"] == "Success" for result in results) else "Error"
+    return {"tool name": "batch", "status": status, "output": results}
+
 async def execute_tool(tool_name: str, tool_args: dict) -> dict:
+    if tool_name == "batch":
+        return await _execute_batch(tool_args.get("calls"))
+
     if tool_name == "run_shell_command":
         command = tool_args.get("command", "")
         if isinstance(command, str):
@@ -26,10 +73,18 @@ async def execute_tool(tool_name: str, tool_args: dict) -> dict:
                     }
                 else:
                     return {"tool name": tool_name, "status": "Error", "output": f"Directory not found: {new_path}"}
-            tool_args["command"] = shlex.split(command)
 
         # Always use the current directory from directory manager
         tool_args["directory"] = directory_manager.current_directory
+    else:
+        base = directory_manager.current_directory
+        # normpath is pure string work: no realpath()/stat of each component like Path.resolve()
+        relative = {
+            key: os.path.normpath(os.path.join(base, value)) for key in _PATH_ARGS
+            if isinstance(value := tool_args.get(key), str) and value and not os.path.isabs(value)
+        }
+        if relative:
+            tool_args = {**tool_args, **relative}
 
     if tool_name in available_tools:
         tool_function = available_tools[tool_name]
@@ -38,7 +93,8 @@ async def execute_tool(tool_name: str, tool_args: dict) -> dict:
             if inspect.iscoroutinefunction(tool_function):
                 raw_output = await tool_function(**tool_args)
             else:
-                raw_output = tool_function(**tool_args)
+                # Off the event loop, so the spinner keeps animating while e.g. find_files walks a tree
+                raw_output = await asyncio.to_thread(tool_function, **tool_args)
             if tool_name == "run_shell_command":
                 if raw_output['result']['exit_code'] != 0:
                     return {"tool name": tool_name, "status": "Error", "output": raw_output}
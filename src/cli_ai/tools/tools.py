@@ -1,56 +1,471 @@
 
 import asyncio
-import aiofiles
+import fnmatch
 import os
 import inspect
-from typing import Any, Optional
+import io
+import json
+import re
+import selectors
+import shlex
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+from ..utils.directory_manager import directory_manager
 from .vision.image_classifier import describe_image
 from .vision.similarity import find_similar_images
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Shell syntax (operators, redirection, expansion, globbing, leading VAR=value) that only a
+# shell can interpret; commands without it are exec'd directly
+_NEEDS_SHELL = re.compile(r"[|&;<>()$`*?\[\]{}~\n\\]|^\s*\w+=")
+
+# Commands that create, remove or rename directory entries; listings cached by
+# list_directory are dropped after one runs (as after any command run through the shell)
+_MUTATING_COMMANDS = frozenset({"mkdir", "rm", "rmdir", "mv", "cp", "touch", "ln"})
+
+# Output kept per stream; anything beyond would not fit the LLM context anyway
+_OUTPUT_CAP_BYTES = 1024 * 1024
+# Pipe reads are taken in 64 KiB chunks; the asyncio stream buffer may hold several before
+# the transport pauses the pipe, instead of stalling at twice the default 64 KiB limit
+_PIPE_CHUNK_BYTES = 64 * 1024
+_STREAM_LIMIT_BYTES = 4 * _PIPE_CHUNK_BYTES
+# A command run through the persistent shell that has not finished by then is killed
+# (with the shell, which is respawned) so it cannot hold the shell for every later command
+_SHELL_TIMEOUT_SECONDS = 300
+
+# Sparse line index for paged reads: (line number, byte offset) checkpoints taken at each
+# 1 MiB scan chunk, so a later read of the same file seeks close to `offset` instead of
+# re-reading every line before it
+_LINE_INDEX_CHUNK = 1024 * 1024
+_LINE_INDEX_MAX_FILES = 32
+_line_index: Dict[str, dict] = {}
+_line_index_lock = threading.Lock()
+
+# File I/O gets its own pool so a burst of reads neither queues behind nor starves other
+# users of the default executor (the shell, vision calls). The semaphore caps how many
+# calls may be waiting on the pool at once.
+_IO_MAX_WORKERS = 32
+_IO_MAX_PENDING = 64
+_IO_EXECUTOR = ThreadPoolExecutor(max_workers=_IO_MAX_WORKERS, thread_name_prefix="tools-io")
+_io_semaphore: Optional[asyncio.Semaphore] = None
+_io_semaphore_loop = None
+
+# Agent loops re-read the same files (instructions, the source being edited) many times per
+# session; contents of files up to 1 MiB are kept, keyed by path, mtime and size. Reads that
+# take longer than the timeout (a hung network mount) are reported instead of awaited.
+_READ_CACHE_FILES = 64
+_READ_CACHE_MAX_BYTES = 1024 * 1024
+_READ_TIMEOUT_SECONDS = 10
+
+# Fixed validation errors, built once: a confused model can hit these every turn. Plain
+# dicts (not MappingProxyType) because tool output is JSON-serialized into the workspace;
+# nothing downstream mutates a tool's result.
+_ERR_NEGATIVE_OFFSET = {"error": "Offset must be a non-negative number."}
+_ERR_NON_POSITIVE_LIMIT = {"error": "Limit must be a positive number."}
+_ERR_OFFSET_WITHOUT_LIMIT = {"error": "Limit must be provided when offset is used."}
+_ERR_NOT_A_LIST = {"error": "Input 'data_list' must be a list."}
+_ERR_INDEX_AND_FILTER = {"error": "Cannot use 'index' with 'filter_key' or 'filter_value' simultaneously."}
+_ERR_NO_SELECTOR = {"error": "Either 'index' or both 'filter_key' and 'filter_value' must be provided."}
+
 # --- 1. ASYNC TOOL IMPLEMENTATIONS ---
 
-async def run_shell_command(command: list, directory: Optional[str] = None) -> dict:
-    """Executes a shell command asynchronously and returns its structured output."""
+async def _run_io(func: Callable, *args) -> Any:
+    """Run a blocking file operation on the tool I/O pool."""
+    global _io_semaphore, _io_semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _io_semaphore_loop is not loop:
+        # asyncio primitives belong to one event loop; each asyncio.run() gets a fresh one
+        _io_semaphore = asyncio.Semaphore(_IO_MAX_PENDING)
+        _io_semaphore_loop = loop
+    async with _io_semaphore:
+        return await loop.run_in_executor(_IO_EXECUTOR, func, *args)
+
+class _CappedBuffer:
+    """Accumulates subprocess output up to `cap` bytes and remembers whether more was dropped."""
+
+    def __init__(self, cap: int):
+        self.cap = cap
+        self.data = bytearray()
+        self.truncated = False
+
+    def add(self, chunk: bytes):
+        room = self.cap - len(self.data)
+        if len(chunk) <= room:
+            self.data += chunk  # The common case: no slice copy
+            return
+        self.truncated = True
+        if room > 0:
+            self.data += chunk[:room]
+
+    def text(self) -> str:
+        if not self.data and not self.truncated:
+            return ""
+        text = self.data.decode('utf-8', errors='replace')
+        if self.truncated:
+            text += f"\n...[output truncated at {self.cap} bytes]"
+        return text
+
+async def _collect_output(stream: asyncio.StreamReader, cap: int = _OUTPUT_CAP_BYTES) -> _CappedBuffer:
+    """
+    Read a subprocess pipe to EOF, keeping at most `cap` bytes.
+    Excess output is drained and dropped so the child never blocks on a full pipe.
+    """
+    buffer = _CappedBuffer(cap)
+    while True:
+        chunk = await stream.read(_PIPE_CHUNK_BYTES)
+        if not chunk:
+            break
+        buffer.add(chunk)
+    return buffer
+
+def _command_result(stdout: _CappedBuffer, stderr: _CappedBuffer, exit_code: Optional[int]) -> dict:
+    """Structured run_shell_command output; `truncated` flags output dropped past the cap."""
+    return {
+        "result": {
+            "stdout": stdout.text(),
+            "stderr": stderr.text(),
+            "exit_code": exit_code,
+            "truncated": stdout.truncated or stderr.truncated
+        }
+    }
+
+class _PersistentShell:
+    """
+    One long-lived /bin/sh that runs every command needing shell syntax, so each call
+    forks a subshell instead of fork+exec'ing a new shell.
+
+    Each command is eval'd in a `( ... )` subshell with stdin from /dev/null: cd, exports
+    and syntax errors cannot leak into later commands, and nothing reads the control
+    stream. A trailer with the exit status and a per-shell random marker is then printed
+    on both stdout and stderr to delimit the output. The shell is driven with blocking
+    pipes from a worker thread, so it is not tied to any one event loop.
+
+    The shell leads its own process group and ignores SIGHUP, which each subshell restores.
+    Once a command returns, SIGHUP to the group ends anything it left running in the
+    background before the trailer is printed, so no late output lands in the next result
+    (`nohup` jobs survive, as they would a closed terminal). A command still running after
+    `timeout` seconds is killed along with the whole group, and the shell respawned.
+    """
+
+    def __init__(self):
+        self.process: Optional[subprocess.Popen] = None
+        self.lock = threading.Lock()
+        marker = uuid.uuid4().hex
+        self.start = f"\x1e{marker}:".encode()
+        self.end = f":{marker}\x1e".encode()
+
+    def _ensure_started(self) -> subprocess.Popen:
+        if self.process is None or self.process.poll() is not None:
+            self.process = subprocess.Popen(
+                ["/bin/sh"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=True
+            )
+            self.process.stdin.write(b"trap '' HUP\n")
+        return self.process
+
+    def _kill(self, process: subprocess.Popen) -> int:
+        """Kill the shell and every process left in its group; return the shell's status."""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.process = None
+        return process.wait()
+
+    def _read_until_trailers(self, process: subprocess.Popen, stdout: _CappedBuffer, stderr: _CappedBuffer,
+                             deadline: float) -> tuple:
+        """
+        Read one command's output from both pipes. Returns (exit status, timed out); the
+        status is None if the shell died or `deadline` (a time.monotonic() value) passed.
+        """
+        # Bytes that might still be the start of a split trailer are held back
+        window = len(self.start) + len(self.end) + 16
+        pending = {process.stdout.fileno(): bytearray(), process.stderr.fileno(): bytearray()}
+        buffers = {process.stdout.fileno(): stdout, process.stderr.fileno(): stderr}
+        exit_code = None
+        with selectors.DefaultSelector() as selector:
+            for fd in pending:
+                selector.register(fd, selectors.EVENT_READ)
+            while selector.get_map():
+                events = selector.select(deadline - time.monotonic())
+                if not events and time.monotonic() >= deadline:
+                    for fd, data in pending.items():
+                        buffers[fd].add(data)
+                    return None, True
+                for key, _ in events:
+                    fd = key.fd
+                    chunk = os.read(fd, _PIPE_CHUNK_BYTES)
+                    data = pending[fd]
+                    if not chunk:
+                        # EOF: the shell itself exited
+                        buffers[fd].add(data)
+                        selector.unregister(fd)
+                        continue
+                    data += chunk
+                    end = data.find(self.end)
+                    if end != -1:
+                        start = data.rfind(self.start, 0, end)
+                        buffers[fd].add(data[:start])
+                        if fd == process.stdout.fileno():
+                            exit_code = int(data[start + len(self.start):end])
+                        selector.unregister(fd)
+                        continue
+                    flush = len(data) - window
+                    if flush > 0:
+                        buffers[fd].add(data[:flush])
+                        del data[:flush]
+        return exit_code, False
+
+    def run(self, command: str, directory: Optional[str], timeout: float = _SHELL_TIMEOUT_SECONDS) -> dict:
+        with self.lock:
+            deadline = time.monotonic() + timeout
+            process = self._ensure_started()
+            body = 'trap - HUP; eval "$__cli_ai_cmd"'
+            if directory:
+                body = f"cd {shlex.quote(directory)} && {body}"
+            trailer = f"printf '%s%d%s' '{self.start.decode()}' $__cli_ai_rc '{self.end.decode()}'"
+            script = (
+                f"__cli_ai_cmd={shlex.quote(command)}\n"
+                f"( {body} ) < /dev/null; __cli_ai_rc=$?\n"
+                f"kill -HUP 0; {trailer}; {trailer} >&2\n"
+            )
+            stdout, stderr = _CappedBuffer(_OUTPUT_CAP_BYTES), _CappedBuffer(_OUTPUT_CAP_BYTES)
+            timed_out = False
+            try:
+                process.stdin.write(script.encode())
+                process.stdin.flush()
+                exit_code, timed_out = self._read_until_trailers(process, stdout, stderr, deadline)
+            except BrokenPipeError:
+                exit_code = None
+            if timed_out:
+                exit_code = self._kill(process)
+                stderr.add(f"\n...[command timed out after {timeout:g}s and was killed]".encode())
+            elif exit_code is None:
+                # The shell itself exited (e.g. the command killed it); clear out whatever
+                # it left behind and respawn on next use
+                exit_code = self._kill(process)
+            return _command_result(stdout, stderr, exit_code)
+
+_SHELL = _PersistentShell()
+
+def needs_shell(command: Union[list, str]) -> bool:
+    """Whether run_shell_command would hand `command` to /bin/sh rather than exec it directly."""
+    if not isinstance(command, str):
+        return False
+    if _NEEDS_SHELL.search(command):
+        return True
     try:
-        process = await asyncio.create_subprocess_exec(
-            *command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=directory # Use the provided directory
+        shlex.split(command)
+    except ValueError:
+        return True  # Unbalanced quotes; the shell reports it
+    return False
+
+async def run_shell_command(command: Union[list, str], directory: Optional[str] = None) -> dict:
+    """
+    Executes a command asynchronously and returns its structured output.
+    An argv list is executed directly. A string is executed directly too unless it
+    uses shell syntax (pipes, redirection, globbing, variables), which runs it
+    through a long-lived system shell (in a fresh subshell per command).
+    """
+    try:
+        if not needs_shell(command) and isinstance(command, str):
+            # Plain command: skip the /bin/sh fork+exec
+            command = shlex.split(command)
+        if isinstance(command, str):
+            if os.name == "posix":
+                output = await asyncio.to_thread(_SHELL.run, command, directory)
+                clear_cache()
+                # The command may have moved or replaced the directory the descriptor points at
+                directory_manager.release_directory_fd()
+                return output
+            process = await asyncio.create_subprocess_shell(
+                command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=directory,
+                limit=_STREAM_LIMIT_BYTES
+            )
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=directory, # Use the provided directory
+                limit=_STREAM_LIMIT_BYTES
+            )
+        stdout, stderr = await asyncio.gather(
+            _collect_output(process.stdout),
+            _collect_output(process.stderr)
         )
-        stdout, stderr = await process.communicate()
-        return {
-            "result": {
-                "stdout": stdout.decode(),
-                "stderr": stderr.decode(),
-                "exit_code": process.returncode
-            }
-        }
+        await process.wait()
+        if isinstance(command, str) or (command and os.path.basename(command[0]) in _MUTATING_COMMANDS):
+            clear_cache()
+            directory_manager.release_directory_fd()
+        return _command_result(stdout, stderr, process.returncode)
     except Exception as e:
         return {"error": str(e)}
 
+def _noatime_opener(path: str, flags: int) -> int:
+    """open() opener that skips the atime update; refused for files the user does not own."""
+    try:
+        return os.open(path, flags | getattr(os, 'O_NOATIME', 0))
+    except PermissionError:
+        return os.open(path, flags)
+
+def _scan_line_starts(key: str, scan_pos: int, scan_line: int, pending_cr: bool, offset: int) -> Optional[tuple]:
+    """
+    Count newlines from `scan_pos` until a line past `offset` (or EOF) is reached.
+    Returns (new checkpoints, scan_pos, scan_line, pending_cr, done), or None on a lone
+    CR line ending. `pending_cr` carries a '\r' ending the previous chunk across the
+    boundary, so a CRLF split between two reads still counts as one line break.
+    """
+    checkpoints = []
+    done = False
+    with open(key, 'rb', opener=_noatime_opener) as f:
+        f.seek(scan_pos)
+        while not checkpoints or checkpoints[-1][0] < offset:
+            chunk = f.read(_LINE_INDEX_CHUNK)
+            if not chunk:
+                # A '\r' ending the file only starts a line after every checkpoint
+                done = True
+                break
+            if pending_cr and not chunk.startswith(b'\n'):
+                return None
+            trailing_cr = chunk.endswith(b'\r')
+            if b'\r' in chunk and chunk.count(b'\r') - trailing_cr != chunk.count(b'\r\n'):
+                # Text mode also splits on a lone '\r'; byte counts would disagree
+                return None
+            pending_cr = trailing_cr
+            newlines = chunk.count(b'\n')
+            scan_pos += len(chunk)
+            if newlines:
+                scan_line += newlines
+                checkpoints.append((scan_line, scan_pos - len(chunk) + chunk.rindex(b'\n') + 1))
+    return checkpoints, scan_pos, scan_line, pending_cr, done
+
+def _line_checkpoint(file_path: str, offset: int) -> tuple:
+    """
+    Return (line number, byte offset) of an indexed line start at or before `offset`,
+    extending the file's index as far as needed. Returns (0, 0) for files whose line
+    breaks cannot be counted in bytes (lone CR line endings).
+    """
+    key = os.path.abspath(file_path)
+    stat = os.stat(key)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _line_index_lock:
+        index = _line_index.get(key)
+        if index is None or index["stamp"] != stamp:
+            if len(_line_index) >= _LINE_INDEX_MAX_FILES:
+                _line_index.pop(next(iter(_line_index)))
+            index = {"stamp": stamp, "lines": [0], "positions": [0], "scan_line": 0, "scan_pos": 0,
+                     "pending_cr": False, "done": False}
+            _line_index[key] = index
+        if index["lines"] is None:
+            return 0, 0
+        if index["lines"][-1] >= offset or index["done"]:
+            i = bisect_right(index["lines"], offset) - 1
+            return index["lines"][i], index["positions"][i]
+        base = (index["lines"][-1], index["positions"][-1])
+        scan_pos, scan_line, pending_cr = index["scan_pos"], index["scan_line"], index["pending_cr"]
+
+    # Scan without the lock, so one large file never stalls paged reads of the others
+    scanned = _scan_line_starts(key, scan_pos, scan_line, pending_cr, offset)
+
+    with _line_index_lock:
+        # Publish only if nobody replaced or extended this index in the meantime
+        current = _line_index.get(key) is index and index["lines"] is not None and index["scan_pos"] == scan_pos
+        if scanned is None:
+            if current:
+                index["lines"] = None
+            return 0, 0
+        checkpoints, index_pos, index_line, pending_cr, done = scanned
+        if current:
+            for line, position in checkpoints:
+                index["lines"].append(line)
+                index["positions"].append(position)
+            index.update(scan_pos=index_pos, scan_line=index_line, pending_cr=pending_cr, done=done)
+
+    checkpoints = [base] + checkpoints
+    i = bisect_right(checkpoints, (offset, float('inf'))) - 1
+    return checkpoints[i]
+
+def _read_line_slice(file_path: str, offset: int, limit: int) -> List[str]:
+    """Read lines [offset, offset + limit) by streaming, so only that window is held in memory."""
+    first_line, position = _line_checkpoint(file_path, offset) if offset else (0, 0)
+    with open(file_path, 'rb', opener=_noatime_opener) as raw:
+        raw.seek(position)
+        f = io.TextIOWrapper(raw, encoding='utf-8')
+        try:
+            return list(islice(f, offset - first_line, offset - first_line + limit))
+        finally:
+            f.detach()
+
+def _read_whole_file(file_path: str) -> str:
+    """Read a whole text file without touching its atime, asking the kernel for full readahead."""
+    with open(file_path, 'r', encoding='utf-8', opener=_noatime_opener) as f:
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            except OSError:
+                pass  # Pipes and some filesystems do not take advice
+        return f.read()
+
+@lru_cache(maxsize=_READ_CACHE_FILES)
+def _read_cached(real_path: str, mtime_ns: int, size: int) -> str:
+    """Whole-file contents, keyed by the file's mtime and size so an edited file is read again."""
+    return _read_whole_file(real_path)
+
+def _read_text(file_path: str) -> str:
+    """Whole-file read that reuses the contents of small files read before and unchanged since."""
+    real_path = os.path.realpath(file_path)
+    stat = os.stat(real_path)
+    if stat.st_size > _READ_CACHE_MAX_BYTES:
+        return _read_whole_file(real_path)
+    return _read_cached(real_path, stat.st_mtime_ns, stat.st_size)
+
 async def read_text_file(file_path: str, offset: Optional[int] = None, limit: Optional[int] = None) -> dict:
     """
     Reads a text-based file asynchronously and returns its content, with optional line-based slicing.
     Only works with text files (.txt, .py, .js, .html, .css, .md, etc.). Cannot read binary files like PDFs, images, or executables.
     """
     if offset is not None and offset < 0:
-        return {"error": "Offset must be a non-negative number."}
+        return _ERR_NEGATIVE_OFFSET
     if limit is not None and limit <= 0:
-        return {"error": "Limit must be a positive number."}
+        return _ERR_NON_POSITIVE_LIMIT
     if offset is not None and limit is None:
-        return {"error": "Limit must be provided when offset is used."}
+        return _ERR_OFFSET_WITHOUT_LIMIT
 
     try:
-        async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-            if offset is not None and limit is not None:
-                lines = await f.readlines()
-                sliced_lines = lines[offset : offset + limit]
-                content = "".join(sliced_lines)
-                return {"result": {"content": content, "lines_read": len(sliced_lines)}}
-            else:
-                content = await f.read()
-                return {"result": {"content": content}}
+        # Blocking reads run on the I/O pool; cheaper per call than an async file wrapper
+        if offset is not None and limit is not None:
+            sliced_lines = await asyncio.wait_for(
+                _run_io(_read_line_slice, file_path, offset, limit), _READ_TIMEOUT_SECONDS
+            )
+            content = "".join(sliced_lines)
+            return {"result": {"content": content, "lines_read": len(sliced_lines)}}
+        else:
+            content = await asyncio.wait_for(_run_io(_read_text, file_path), _READ_TIMEOUT_SECONDS)
+            return {"result": {"content": content}}
+    except asyncio.TimeoutError:
+        return {"error": f"Timed out after {_READ_TIMEOUT_SECONDS}s reading {file_path}"}
     except FileNotFoundError:
         return {"error": f"File not found at {file_path}"}
     except UnicodeDecodeError:
@@ -60,26 +475,180 @@ async def read_text_file(file_path: str, offset: Optional[int] = None, limit: Op
 
 async def write_file(file_path: str, content: str) -> dict:
     """Writes to a text-based file asynchronously and returns a success status."""
-    if not isinstance(content, str):
-        content = content['stdout']
     try:
-        async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-            await f.write(content)
+        if not isinstance(content, str):
+            content = content['stdout']
+        # Encode before opening: an unencodable string must not leave a truncated file behind
+        data = content.encode('utf-8')
+        await _run_io(Path(file_path).write_bytes, data)
+        clear_cache()
         return {"result": "success"}
-    except UnicodeDecodeError:
+    except UnicodeEncodeError:
         return {"error": f"Cannot write file at {file_path}. This is not a text-based file."}
     except Exception as e:
         return {"error": str(e)}
 
-def list_directory(path: str = '.') -> dict:
-    """Lists a directory and returns its contents as a list."""
+@lru_cache(maxsize=128)
+def _scan_directory(abs_path: str, mtime_ns: int) -> tuple:
+    """
+    Entry names of a directory. The mtime key drops stale results once the directory changes;
+    on filesystems with coarse mtimes (FAT, some NFS) a change within the same tick is only
+    seen because mutating tools clear this cache.
+    """
+    with os.scandir(abs_path) as it:
+        return tuple(entry.name for entry in it)
+
+def _scan_directory_details(path: str) -> list:
+    """
+    Entries of a directory with their type and size. Not cached: a file can change size
+    without touching the directory's mtime.
+    """
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            # is_dir(follow_symlinks=False) comes from getdents' d_type; stat() is cached on the entry
+            is_dir = entry.is_dir(follow_symlinks=False)
+            entries.append({
+                "path": os.path.join(path, entry.name),
+                "is_dir": is_dir,
+                "size": None if is_dir else entry.stat(follow_symlinks=False).st_size
+            })
+    return entries
+
+def list_directory(path: str = '.', details: bool = False) -> dict:
+    """
+    Lists a directory and returns its contents as a list.
+    With details=True each entry is a dict with its path, is_dir and size (bytes, None for directories).
+    """
     try:
-        entries = os.listdir(path)
+        if details:
+            return {"result": _scan_directory_details(path)}
+        abs_path = os.path.abspath(path)
+        # Listing the agent's own directory (the usual case) fstats its cached descriptor
+        # instead of walking the whole path again
+        fd = directory_manager.directory_fd() if abs_path == directory_manager.current_directory else None
+        entries = _scan_directory(abs_path, os.stat(path if fd is None else fd).st_mtime_ns)
         absolute_paths = [os.path.join(path, entry) for entry in entries]
         return {"result": absolute_paths}
     except Exception as e:
         return {"error": str(e)}
 
+@wraps(list_directory)
+async def list_directory_async(path: str = '.', details: bool = False) -> dict:
+    # A names-only listing is one (usually cached) scandir: cheaper inline than a thread
+    # hop. Detailed listings stat every entry, so those leave the event loop.
+    if details:
+        return await _run_io(list_directory, path, details)
+    return list_directory(path)
+
+# Directories find_files does not descend into by default: VCS metadata, environments and
+# caches that dwarf the source tree and almost never hold what the user is looking for.
+# Hidden directories are skipped as well.
+_FIND_PRUNE = frozenset({".git", ".venv", "venv", "node_modules", "__pycache__", ".yarn", ".mypy_cache", ".cli_ai"})
+
+def _expand_braces(pattern: str) -> List[str]:
+    """Expand shell-style brace alternatives: '*.{py,md}' -> ['*.py', '*.md']. Nesting is supported."""
+    depth = 0
+    for i, char in enumerate(pattern):
+        if char == '{':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif char == '}' and depth:
+            depth -= 1
+            if depth:
+                continue
+            # Split the group's body on its top-level commas
+            parts, level, begin = [], 0, start + 1
+            for j in range(start + 1, i):
+                if pattern[j] == '{':
+                    level += 1
+                elif pattern[j] == '}':
+                    level -= 1
+                elif pattern[j] == ',' and level == 0:
+                    parts.append(pattern[begin:j])
+                    begin = j + 1
+            if not parts:
+                continue  # '{x}' without a comma is literal, as in bash
+            parts.append(pattern[begin:i])
+            prefix, suffix = pattern[:start], pattern[i + 1:]
+            return [expanded for part in parts for expanded in _expand_braces(prefix + part + suffix)]
+    return [pattern]
+
+@lru_cache(maxsize=64)
+def _compile_glob(pattern: str) -> Callable[[str], Any]:
+    """Compile a file name glob (with brace alternatives) into one regex match function."""
+    regex = "|".join(fnmatch.translate(p) for p in _expand_braces(pattern))
+    # fnmatch.fnmatch is case-insensitive where the filesystem is (Windows); keep that
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+    return re.compile(regex, flags).match
+
+def _walk_matches(path: str, match: Callable[[str], Any], prune: frozenset, skip_hidden: bool):
+    """Yield (mtime, path) for files under `path` whose name satisfies `match`, in one scandir pass."""
+    try:
+        it = os.scandir(path)
+    except OSError:
+        return  # Unreadable subdirectory; skip it like `find` would
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                # Pruned before descending, so the whole subtree costs no syscalls
+                if entry.name in prune or (skip_hidden and entry.name.startswith('.')):
+                    continue
+                yield from _walk_matches(entry.path, match, prune, skip_hidden)
+            elif match(entry.name) is not None:
+                # DirEntry.stat() is cached, and on some platforms comes with the listing itself
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    # A dangling symlink has no target to stat; date it by the link itself
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue  # Removed mid-walk
+                yield stat.st_mtime, entry.path
+
+def find_files(pattern: str, path: str = '.', exclude: Optional[List[str]] = None) -> dict:
+    """
+    Recursively finds files under a directory whose names match a glob pattern (e.g. '*.py',
+    or '*.{py,md}' for alternatives), newest first. Symlinked directories are not followed.
+    Hidden directories and caches such as .git, node_modules and __pycache__ are skipped;
+    pass `exclude` (a list of directory names, possibly empty) to skip exactly those instead.
+    """
+    if not os.path.isdir(path):
+        return {"error": f"Directory not found: {path}"}
+    try:
+        if exclude is None:
+            prune, skip_hidden = _FIND_PRUNE, True
+        else:
+            prune, skip_hidden = frozenset([exclude] if isinstance(exclude, str) else exclude), False
+        matches = list(_walk_matches(path, _compile_glob(pattern), prune, skip_hidden))
+        # The mtime was captured during the walk, so sorting issues no syscalls; keying on it
+        # alone also skips comparing paths whenever two mtimes tie
+        matches.sort(key=itemgetter(0), reverse=True)
+        return {"result": [file_path for _, file_path in matches]}
+    except Exception as e:
+        return {"error": str(e)}
+
+@lru_cache(maxsize=64)
+def _make_filter(filter_key: str, return_key: Optional[str]) -> Callable[[list, Any], list]:
+    """
+    Build a filter/projection specialized for one (filter_key, return_key) pair.
+    
+    The keys are inlined as literals, so the generated comprehension uses plain
+    `in`/subscript instead of .get() calls. Only valid for lists that contain
+    nothing but dicts; agent loops repeat the same key pair, so each shape is
+    compiled once.
+    """
+    condition = f"{filter_key!r} in item and item[{filter_key!r}] == value"
+    if return_key is None:
+        projection = "item"
+    else:
+        projection = f"(item[{return_key!r}] if {return_key!r} in item else None)"
+    namespace: Dict[str, Any] = {}
+    exec(f"def _filter(data, value):\n    return [{projection} for item in data if {condition}]", namespace)
+    return namespace["_filter"]
+
 def select_from_list(data_list: list, index: Optional[int] = None, filter_key: Optional[str] = None, filter_value: Any = None, return_key: Optional[str] = None) -> dict:
     """Selects an item from a list by index or filters a list of dictionaries by key-value pair.
 
@@ -94,22 +663,25 @@ def select_from_list(data_list: list, index: Optional[int] = None, filter_key: O
         data_list = [data_list]
     try:
         if not isinstance(data_list, list):
-            return {"error": "Input 'data_list' must be a list."}
+            return _ERR_NOT_A_LIST
 
         if index is not None and (filter_key is not None or filter_value is not None):
-            return {"error": "Cannot use 'index' with 'filter_key' or 'filter_value' simultaneously."}
+            return _ERR_INDEX_AND_FILTER
 
         if index is not None:
             if not (0 <= index < len(data_list)):
                 return {"error": f"Index {index} is out of bounds for list of size {len(data_list)}."}
             return {"result": data_list[index]}
         elif filter_key is not None and filter_value is not None:
+            if (type(filter_key) is str and (return_key is None or type(return_key) is str)
+                    and all(type(item) is dict for item in data_list)):
+                return {"result": _make_filter(filter_key, return_key or None)(data_list, filter_value)}
             filtered_list = [item for item in data_list if isinstance(item, dict) and item.get(filter_key) == filter_value]
             if return_key:
                 return {"result": [item.get(return_key) for item in filtered_list if isinstance(item, dict)]}
             return {"result": filtered_list}
         else:
-            return {"error": "Either 'index' or both 'filter_key' and 'filter_value' must be provided."}
+            return _ERR_NO_SELECTOR
     except Exception as e:
         return {"error": str(e)}
 
@@ -118,12 +690,14 @@ available_tools = {
     "run_shell_command": run_shell_command,
     "read_text_file": read_text_file,
     "write_file": write_file,
-    "list_directory": list_directory,
+    "list_directory": list_directory_async,
+    "find_files": find_files,
     "describe_image": describe_image,
     "find_similar_images": find_similar_images
 }
 
 # --- TOOL DOCUMENTATION EXTRACTION ---
+@lru_cache(maxsize=1)
 def get_tool_docstrings() -> str:
     """
     Extracts and formats docstrings from all available tools.
@@ -152,135 +726,144 @@ Documentation:
     
     return "\n".join(docstring_info)
 
+def clear_cache() -> None:
+    """
+    Drop cached file contents and directory listings. Both are keyed by mtime, but on
+    filesystems with coarse timestamps a change within the same tick is only seen after this.
+    """
+    _read_cached.cache_clear()
+    _scan_directory.cache_clear()
+
+def invalidate_cache() -> None:
+    """Drop cached tool documentation; call after registering tools in available_tools."""
+    get_tool_docstrings.cache_clear()
+
 # --- 3. TOOL SCHEMA ---
+def _function_schema(name: str, description: str, properties: Dict[str, Any], required: Optional[List[str]] = None,
+                     **parameter_rules: Any) -> dict:
+    """
+    Build one function-calling schema entry from the parts that differ between tools.
+    Extra keyword arguments (e.g. oneOf, dependencies) are added to the parameters object.
+    """
+    parameters: Dict[str, Any] = {"type": "object", "properties": properties}
+    if required is not None:
+        parameters["required"] = required
+    parameters.update(parameter_rules)
+    return {"type": "function", "function": {"name": name, "description": description, "parameters": parameters}}
+
 tools_schema = [
-    {
-        "type": "function",
-        "function": {
-            "name": "run_shell_command",
-            "description": "Executes a shell command.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "command": {"type": "array", "items": {"type": "string"}, "description": "The command to execute, as a list of strings."},
-                    "directory": {"type": "string", "description": "The directory to execute the command in. Defaults to the current working directory."}
-                },
-                "required": ["command"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "read_text_file",
-            "description": "Reads the content of text-based files only (.txt, .py, .js, .html, .css, .md, .json, etc.). Cannot read binary files like PDFs, images, or executables. Use image-specific tools for image files.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "file_path": {"type": "string", "description": "The absolute path to the TEXT file (never use for images, PDFs, or other binary files)."},
-                    "offset": {"type": "integer", "description": "The 0-based line number to start reading from."},
-                    "limit": {"type": "integer", "description": "The maximum number of lines to read."}
-                },
-                "required": ["file_path"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "write_file",
-            "description": "Writes content to a text-basedfile.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "file_path": {"type": "string", "description": "The path to the file."},
-                    "content": {"type": "string", "description": "The content to write."}
-                },
-                "required": ["file_path", "content"]
-            }
+    _function_schema(
+        "run_shell_command",
+        "Executes a shell command.",
+        {
+            "command": {"type": "array", "items": {"type": "string"}, "description": "The command to execute, as a list of strings."},
+            "directory": {"type": "string", "description": "The directory to execute the command in. Defaults to the current working directory."}
+        },
+        required=["command"]
+    ),
+    _function_schema(
+        "read_text_file",
+        "Reads the content of text-based files only (.txt, .py, .js, .html, .css, .md, .json, etc.). Cannot read binary files like PDFs, images, or executables. Use image-specific tools for image files.",
+        {
+            "file_path": {"type": "string", "description": "The absolute path to the TEXT file (never use for images, PDFs, or other binary files)."},
+            "offset": {"type": "integer", "description": "The 0-based line number to start reading from."},
+            "limit": {"type": "integer", "description": "The maximum number of lines to read."}
+        },
+        required=["file_path"]
+    ),
+    _function_schema(
+        "write_file",
+        "Writes content to a text-basedfile.",
+        {
+            "file_path": {"type": "string", "description": "The path to the file."},
+            "content": {"type": "string", "description": "The content to write."}
+        },
+        required=["file_path", "content"]
+    ),
+    _function_schema(
+        "list_directory",
+        "Lists files and directories in a path.",
+        {
+            "path": {"type": "string", "description": "The directory path."},
+            "details": {"type": "boolean", "description": "Also return whether each entry is a directory and its size in bytes. Defaults to false."}
+        },
+        required=["path"]
+    ),
+    _function_schema(
+        "find_files",
+        "Recursively finds files whose names match a glob pattern under a directory, newest first.",
+        {
+            "pattern": {"type": "string", "description": "The file name pattern, e.g. '*.py', 'report_*.csv' or '*.{jpg,png}'."},
+            "path": {"type": "string", "description": "The directory to search. Defaults to the current working directory."},
+            "exclude": {"type": "array", "items": {"type": "string"}, "description": "Directory names not to descend into. Defaults to hidden directories and caches like .git, node_modules and __pycache__; pass [] to search everything."}
+        },
+        required=["pattern"]
+    ),
+    _function_schema(
+        "describe_image",
+        "Analyzes and describes the content of image files (.jpg, .png, .webp, .avif, etc.). Can answer questions about what's in the image, identify objects, people, text, or analyze visual content.",
+        {
+            "image_path": {"type": "string", "description": "The absolute path to the image file."},
+            "question": {"type": "string", "description": "The question to ask about the image, e.g., 'What is in this image?', 'Is there a dog?', 'Describe this photo'. Returns an 'is_match' boolean for yes/no questions."}
+        },
+        required=["image_path", "question"]
+    ),
+    _function_schema(
+        "select_from_list",
+        "Selects an item from a list by its index or filters a list of dictionaries by a key-value pair.",
+        {
+            "data_list": {"type": "array", "description": "The list to select from or filter."},
+            "index": {"type": "integer", "description": "The 0-based index of the item to select (mutually exclusive with filter_key/filter_value)."},
+            "filter_key": {"type": "string", "description": "The key to filter dictionaries by (requires filter_value)."},
+            "filter_value": {"type": "string", "description": "The value to match for the filter_key (requires filter_key)."},
+            "return_key": {"type": "string", "description": "If provided, returns a list of values for this key from the filtered items."}
+        },
+        oneOf=[
+            {"required": ["data_list", "index"]},
+            {"required": ["data_list", "filter_key", "filter_value"]}
+        ],
+        dependencies={
+            "return_key": ["filter_key", "filter_value"]
         }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "list_directory",
-            "description": "Lists files and directories in a path.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "path": {"type": "string", "description": "The directory path."}
-                },
-                "required": ["path"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "describe_image",
-            "description": "Analyzes and describes the content of image files (.jpg, .png, .webp, .avif, etc.). Can answer questions about what's in the image, identify objects, people, text, or analyze visual content.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "image_path": {"type": "string", "description": "The absolute path to the image file."},
-                    "question": {"type": "string", "description": "The question to ask about the image, e.g., 'What is in this image?', 'Is there a dog?', 'Describe this photo'. Returns an 'is_match' boolean for yes/no questions."}
-                },
-                "required": ["image_path", "question"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "select_from_list",
-            "description": "Selects an item from a list by its index or filters a list of dictionaries by a key-value pair.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "data_list": {"type": "array", "description": "The list to select from or filter."},
-                    "index": {"type": "integer", "description": "The 0-based index of the item to select (mutually exclusive with filter_key/filter_value)."},
-                    "filter_key": {"type": "string", "description": "The key to filter dictionaries by (requires filter_value)."},
-                    "filter_value": {"type": "string", "description": "The value to match for the filter_key (requires filter_key)."},
-                    "return_key": {"type": "string", "description": "If provided, returns a list of values for this key from the filtered items."}
-                },
-                "oneOf": [
-                    {"required": ["data_list", "index"]},
-                    {"required": ["data_list", "filter_key", "filter_value"]}
-                ],
-                "dependencies": {
-                    "return_key": ["filter_key", "filter_value"]
-                }
-            }
-        }
-    },
-    {
-        "type": "function", 
-        "function": {
-            "name": "find_similar_images",
-            "description": "Finds images that look visually similar to a source image by comparing visual features. CRITICAL: Use EXACT parameter names as specified below - any deviation will cause errors.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "image_path": {
-                        "type": "string", 
-                        "description": "The absolute path to the source image file."
+    ),
+    _function_schema(
+        "find_similar_images",
+        "Finds images that look visually similar to a source image by comparing visual features. CRITICAL: Use EXACT parameter names as specified below - any deviation will cause errors.",
+        {
+            "image_path": {"type": "string", "description": "The absolute path to the source image file."},
+            "search_directory": {"type": "string", "description": "The directory to search for similar images."},
+            "top_k": {"type": "integer", "description": "Number of similar images to return (default: 5)."},
+            "threshold": {"type": "float", "description": "Similarity threshold 0-1 (default: 0.5)."}
+        },
+        required=["image_path", "search_directory"]
+    ),
+    _function_schema(
+        "batch",
+        "Runs several independent tool calls concurrently (e.g. reading multiple files at once) and returns their results in the same order. Only batch calls that do not depend on each other's output.",
+        {
+            "calls": {
+                "type": "array",
+                "description": "The tool calls to run.",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string", "description": "The tool name (any tool except 'batch')."},
+                        "args": {"type": "object", "description": "The arguments for that tool."}
                     },
-                    "search_directory": {
-                        "type": "string", 
-                        "description": "The directory to search for similar images."
-                    },
-                    "top_k": {
-                        "type": "integer", 
-                        "description": "Number of similar images to return (default: 5)."
-                    },
-                    "threshold": {
-                        "type": "float", 
-                        "description": "Similarity threshold 0-1 (default: 0.5)."
-                    }
-                },
-                "required": ["image_path", "search_directory"]
+                    "required": ["name", "args"]
+                }
             }
-        }
-    }
+        },
+        required=["calls"]
+    )
 ]
 
+# Serialized once at import, compactly: the schema is static and is embedded in every prompt
+if HAS_ORJSON:
+    _TOOLS_SCHEMA_JSON = orjson.dumps(tools_schema).decode()
+else:
+    _TOOLS_SCHEMA_JSON = json.dumps(tools_schema, separators=(',', ':'))
+
+def get_tools_schema_json() -> str:
+    """The tool schema as compact JSON, serialized once per process."""
+    return _TOOLS_SCHEMA_JSON
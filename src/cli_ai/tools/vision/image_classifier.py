@@ -1,9 +1,12 @@
 import os
 import base64
 import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any
-from openai import AsyncOpenAI
+from typing import Dict, Any, Optional
+from openai import OpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -13,9 +16,24 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 from .local_models import classify_image as local_classify_image
 
-def encode_image_base64(image_path: str) -> str:
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
+# Answers keyed by (question, sha256 of the image bytes): agent loops often re-ask the same
+# question about the same image, and a model call costs far more than hashing the file
+DESCRIBE_CACHE_SIZE = 64
+_describe_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_describe_cache_lock = threading.Lock()
+
+def _read_image_bytes(image_path: str) -> Optional[bytes]:
+    """The image file's bytes, or None if it cannot be read."""
+    try:
+        return Path(image_path).read_bytes()
+    except OSError:
+        return None
+
+def encode_image_base64(image_path: str, image_bytes: Optional[bytes] = None) -> str:
+    if image_bytes is None:
+        with open(image_path, "rb") as image_file:
+            image_bytes = image_file.read()
+    return base64.b64encode(image_bytes).decode('ascii')
 
 def get_image_mime_type(image_path: str) -> str:
     """Get MIME type from file extension."""
@@ -29,58 +47,66 @@ def get_image_mime_type(image_path: str) -> str:
     }
     return mime_types.get(ext, 'image/jpeg')
 
-async def describe_image_openai(image_path: str, question: str) -> Dict[str, Any]:
-    """Describe and analyze image using OpenAI Vision API."""
+# Shared sync client: its connection pool is thread-safe and not tied to an event loop,
+# so every describe_image call (each runs on its own thread) reuses warm connections
+_openai_client: Optional[OpenAI] = None
+
+def _get_openai_client() -> OpenAI:
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = OpenAI(api_key=OPENAI_API_KEY)
+    return _openai_client
+
+def _describe_image_openai_sync(image_path: str, question: str, image_bytes: Optional[bytes] = None) -> Dict[str, Any]:
+    """Describe and analyze image using OpenAI Vision API (blocking). Pass image_bytes if already read."""
     if not OPENAI_API_KEY:
         return {"error": "OpenAI API key not found in environment variables", "image_path": image_path}
     
     try:
-        # Use context manager so the async HTTP client is closed inside the same event loop
-        base64_image = encode_image_base64(image_path)
+        base64_image = encode_image_base64(image_path, image_bytes)
         mime_type = get_image_mime_type(image_path)
 
-        async with AsyncOpenAI(api_key=OPENAI_API_KEY) as client:
-            response = await client.chat.completions.create(
-                model="gpt-4o",  # Options: gpt-4o-mini, gpt-4o, gpt-4-turbo
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:{mime_type};base64,{base64_image}"
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": question
+        response = _get_openai_client().chat.completions.create(
+            model="gpt-4o",  # Options: gpt-4o-mini, gpt-4o, gpt-4-turbo
+            messages=[
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:{mime_type};base64,{base64_image}"
                             }
-                        ]
-                    }
-                ],
-                max_tokens=200,
-                temperature=0.0,
-                response_format={"type": "text"}
-            )
-
-            # Response handling: normalize to string safely
-            raw = None
-            try:
-                raw = response.choices[0].message.content
-            except Exception:
-                # Fallback for other response shapes
-                raw = str(response)
-
-            content = (raw or "").strip()
-            # keep original casing for description, but determine yes/no for is_match
-            is_match = content.lower().startswith('yes')
-
-            return {
-                "response": content,
-                "image_path": image_path,
-                "is_match": is_match
-            }
+                        },
+                        {
+                            "type": "text",
+                            "text": question
+                        }
+                    ]
+                }
+            ],
+            max_tokens=200,
+            temperature=0.0,
+            response_format={"type": "text"}
+        )
+
+        # Response handling: normalize to string safely
+        raw = None
+        try:
+            raw = response.choices[0].message.content
+        except Exception:
+            # Fallback for other response shapes
+            raw = str(response)
+
+        content = (raw or "").strip()
+        # keep original casing for description, but determine yes/no for is_match
+        is_match = content.lower().startswith('yes')
+
+        return {
+            "response": content,
+            "image_path": image_path,
+            "is_match": is_match
+        }
         
     except Exception as e:
         return {
@@ -88,31 +114,38 @@ async def describe_image_openai(image_path: str, question: str) -> Dict[str, Any
             "image_path": image_path
         }
 
+async def describe_image_openai(image_path: str, question: str) -> Dict[str, Any]:
+    """Describe and analyze image using OpenAI Vision API."""
+    return await asyncio.to_thread(_describe_image_openai_sync, image_path, question)
+
 def describe_image(image_path: str, question: str) -> Dict[str, Any]:
+    # Read once: the same bytes are hashed for the cache key and, on a miss, sent to the model
+    image_bytes = _read_image_bytes(image_path)
+    if image_bytes is None:
+        # Let the backend report the missing/unreadable file
+        return _describe_image_uncached(image_path, question)
+    
+    key = (question, hashlib.sha256(image_bytes).digest())
+    with _describe_cache_lock:
+        cached = _describe_cache.get(key)
+        if cached is not None:
+            _describe_cache.move_to_end(key)
+    if cached is not None:
+        return {**cached, "image_path": image_path}
+    
+    result = _describe_image_uncached(image_path, question, image_bytes)
+    if isinstance(result, dict) and "error" not in result:
+        with _describe_cache_lock:
+            _describe_cache[key] = result
+            _describe_cache.move_to_end(key)
+            while len(_describe_cache) > DESCRIBE_CACHE_SIZE:
+                _describe_cache.popitem(last=False)
+    return result
+
+def _describe_image_uncached(image_path: str, question: str, image_bytes: Optional[bytes] = None) -> Dict[str, Any]:
     if USE_OPENAI:
-        import asyncio
-        import threading
-        
-        result = None
-        exception = None
-        
-        def run_async():
-            nonlocal result, exception
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                result = loop.run_until_complete(describe_image_openai(image_path, question))
-                loop.close()
-            except Exception as e:
-                exception = e
-        
-        thread = threading.Thread(target=run_async)
-        thread.start()
-        thread.join()
-        
-        if exception:
-            return {"error": f"OpenAI API Error: {exception}", "image_path": image_path}
-        return result
+        # Blocking call on the shared client; no per-call thread or event loop needed
+        return _describe_image_openai_sync(image_path, question, image_bytes)
     else:
         import asyncio
         
@@ -15,6 +15,9 @@ client = AsyncOpenAI(
     api_key="not-needed"
 )
 
+# Keep-alive session reused for every request to the local model server
+_session = requests.Session()
+
 # --- Configuration ---
 API_URL = "http://localhost:8002/v1/chat/completions"
 MODEL_NAME = "Qwen/Qwen2.5-VL-3B-Instruct"
@@ -87,7 +90,7 @@ async def classify_image(image_path: str, question: str) -> dict:
     headers = {"Content-Type": "application/json"}
 
     try:
-        response = requests.post(API_URL, headers=headers, json=payload)
+        response = _session.post(API_URL, headers=headers, json=payload)
         response.raise_for_status()
         response_data = response.json()
         content = response_data['choices'][0]['message']['content'].strip().lower()
@@ -1,45 +1,218 @@
-import torch
+import asyncio
 import os
-from PIL import Image
-from transformers import AutoImageProcessor, AutoModel
-from scipy.spatial.distance import cosine
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
+import numpy as np
+from ...utils.embeddings import EmbeddingCache, get_embedding_device
 from ...utils.spinner import Spinner
 
-MODEL_CACHE = {}
+# torch, transformers and PIL are imported inside the functions that use them:
+# they take seconds to load and most sessions never compare images
 
-def get_image_embedding(image_path: str, model_name: str = "facebook/dinov3-vitl16-pretrain-lvd1689m") -> list[float]:
-    if model_name not in MODEL_CACHE:
-        Spinner.set_message(self=Spinner, message=f"Loading model '{model_name}' into memory...")
-        processor = AutoImageProcessor.from_pretrained(model_name)
-        model = AutoModel.from_pretrained(model_name)
-        MODEL_CACHE[model_name] = {"processor": processor, "model": model}
+@dataclass(frozen=True)
+class _Cached:
+    """A loaded embedding model with the processor, device and dtype it runs with."""
+    processor: Any
+    model: Any
+    device: Any
+    dtype: Any
+
+MODEL_CACHE: "dict[str, _Cached]" = {}
+DEFAULT_MODEL = "facebook/dinov3-vitl16-pretrain-lvd1689m"
+# Images per forward pass: large enough to amortize per-layer overhead, small enough to
+# keep a ViT-L batch's activations in memory
+EMBEDDING_BATCH_SIZE = 16
+# Lowercase, without the dot; only a name's extension is lowercased to test it
+IMAGE_EXTENSIONS = frozenset({"png", "jpg", "jpeg", "bmp", "webp", "avif"})
 
-    processor = MODEL_CACHE[model_name]["processor"]
-    model = MODEL_CACHE[model_name]["model"]
+# Embeddings are reused until the image file changes: an in-process LRU in front of the
+# persistent embedding cache, both keyed by (real path, mtime_ns) per model
+EMBEDDING_MEMO_SIZE = 4096
+_embedding_memo: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+_embedding_memo_lock = threading.Lock()
+_embedding_caches = {}
 
+# Loading and forward passes run on one dedicated thread, so the model is never used
+# concurrently while image decoding and preprocessing for later batches run alongside it
+_MODEL_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-embed")
+# Preprocessed batches waiting for the model; bounds the tensors held in memory
+PREPROCESSED_QUEUE_SIZE = 4
+
+def _embedding_key(image_path: str) -> Optional[str]:
+    """Cache key for the image's current contents, or None if it cannot be stat'ed."""
     try:
-        # Open and prepare the image
-        image = Image.open(image_path).convert("RGB")
+        real_path = os.path.realpath(image_path)
+        return f"{real_path}\0{os.stat(real_path).st_mtime_ns}"
+    except OSError:
+        return None
 
-        # Process the image and run it through the DINOv3 model
-        with torch.no_grad(): #Use no_grad for faster inference
-            inputs = processor(images=image, return_tensors ="pt")
-            outputs = model(**inputs)
+def _get_embedding_cache(model_name: str) -> EmbeddingCache:
+    if model_name not in _embedding_caches:
+        _embedding_caches[model_name] = EmbeddingCache(model_name)
+    return _embedding_caches[model_name]
 
-        
-        # The embedding is the last hidden state. We average the patches to get a single vector.
-        embedding = outputs.last_hidden_state.mean(dim=1).squeeze().tolist()
-        return embedding
+def _load_model(model_name: str) -> _Cached:
+    """
+    Processor, model, device and dtype for model_name, loaded on first use. On a GPU the
+    weights are kept in bfloat16 (float16 where bf16 is unsupported), halving memory
+    traffic and using the tensor cores; the CPU stays in float32.
+    """
+    cached = MODEL_CACHE.get(model_name)
+    if cached is None:
+        import torch
+        from transformers import AutoImageProcessor, AutoModel
+
+        Spinner.set_message(self=Spinner, message=f"Loading model '{model_name}' into memory...")
+        device = torch.device(get_embedding_device())
+        if device.type == "cuda":
+            dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        elif device.type == "mps":
+            dtype = torch.float16
+        else:
+            dtype = torch.float32
+        processor = AutoImageProcessor.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name, torch_dtype=dtype).to(device).eval()
+        # Inference only: no autograd bookkeeping on the weights even outside inference_mode
+        model.requires_grad_(False)
+        cached = MODEL_CACHE[model_name] = _Cached(processor, model, device, dtype)
+    return cached
 
+def _open_image(image_path: str):
+    """The image as RGB, or None (with a printed error) if it cannot be opened."""
+    from PIL import Image
+
+    try:
+        return Image.open(image_path).convert("RGB")
     except FileNotFoundError:
         print(f"Error: Image file '{image_path}' not found.")
-        return None
     except Exception as e:
         print(f"An error occurred while processing the image: {e}")
+    return None
+
+def _preprocess(processor, image_paths: list[str]) -> Optional[tuple]:
+    """
+    Decode and preprocess one batch on the CPU. Returns (positions of the images that
+    opened, model inputs), or None if none of them could be used.
+    """
+    opened = [(i, _open_image(path)) for i, path in enumerate(image_paths)]
+    opened = [(i, image) for i, image in opened if image is not None]
+    if not opened:
         return None
+    try:
+        # The processor resizes every image to the same shape, so the batch stacks into one tensor
+        inputs = processor(images=[image for _, image in opened], return_tensors="pt")
+    except Exception as e:
+        print(f"An error occurred while processing the images: {e}")
+        return None
+    return [i for i, _ in opened], inputs
+
+def _forward(loaded: _Cached, inputs) -> np.ndarray:
+    """Unit-length embeddings for one preprocessed batch."""
+    import torch
+
+    device, dtype = loaded.device, loaded.dtype
+    with torch.inference_mode():
+        inputs = {
+            key: value.to(device, dtype=dtype if value.is_floating_point() else None, non_blocking=True)
+            for key, value in inputs.items()
+        }
+        outputs = loaded.model(**inputs)
 
+    # The embedding is the last hidden state. We average the patches to get a single vector
+    # (in float32, so half-precision rounding does not accumulate over the patches).
+    vectors = outputs.last_hidden_state.float().mean(dim=1).cpu().numpy()
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return vectors
 
-def find_similar_images(image_path: str = None, search_directory: str = None, top_k: int = 5, threshold: float = 0.5, **kwargs) -> list[dict]:
+async def _compute_image_embeddings(image_paths: list[str], model_name: str, batch_size: int) -> list:
+    """
+    Run the model over the images, batch_size per forward pass; None where an image fails.
+    Batches are decoded and preprocessed on worker threads (up to one per CPU) while the
+    model thread works through the batches already prepared.
+    """
+    loop = asyncio.get_running_loop()
+    loaded = await loop.run_in_executor(_MODEL_EXECUTOR, _load_model, model_name)
+    embeddings = [None] * len(image_paths)
+    batches = [range(start, min(start + batch_size, len(image_paths))) for start in range(0, len(image_paths), batch_size)]
+    queue = asyncio.Queue(maxsize=PREPROCESSED_QUEUE_SIZE)
+    semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+
+    async def produce(batch: range):
+        async with semaphore:
+            prepared = await asyncio.to_thread(_preprocess, loaded.processor, [image_paths[i] for i in batch])
+        await queue.put((batch, prepared))
+
+    async def consume():
+        for done in range(1, len(batches) + 1):
+            batch, prepared = await queue.get()
+            Spinner.set_message(self=Spinner, message=f" - Analyzing images (batch {done} of {len(batches)})...")
+            if prepared is None:
+                continue
+            positions, inputs = prepared
+            try:
+                vectors = await loop.run_in_executor(_MODEL_EXECUTOR, _forward, loaded, inputs)
+            except Exception as e:
+                print(f"An error occurred while processing the images: {e}")
+                continue
+            for position, vector in zip(positions, vectors):
+                embeddings[batch[position]] = vector
+
+    await asyncio.gather(consume(), *(produce(batch) for batch in batches))
+    return embeddings
+
+async def get_image_embeddings(image_paths: list[str], model_name: str = DEFAULT_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE) -> list:
+    """
+    Embeddings for several images. Returns one unit-length float32 vector per path (so a
+    dot product is the cosine similarity), None where the image could not be processed.
+    Unchanged images are served from cache; the rest are computed batch_size per forward pass.
+    """
+    keys = [_embedding_key(path) for path in image_paths]
+    embeddings = [None] * len(image_paths)
+
+    with _embedding_memo_lock:
+        for i, key in enumerate(keys):
+            if key is not None and (model_name, key) in _embedding_memo:
+                _embedding_memo.move_to_end((model_name, key))
+                embeddings[i] = _embedding_memo[(model_name, key)]
+
+    # One query for everything the process has not seen yet
+    cache = _get_embedding_cache(model_name)
+    stored = await asyncio.to_thread(
+        cache.get_many, [key for i, key in enumerate(keys) if key is not None and embeddings[i] is None]
+    )
+    for i, key in enumerate(keys):
+        if embeddings[i] is None and key in stored:
+            embeddings[i] = np.frombuffer(stored[key], dtype=np.float32)
+
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    computed = await _compute_image_embeddings([image_paths[i] for i in missing], model_name, batch_size) if missing else []
+    for i, embedding in zip(missing, computed):
+        embeddings[i] = embedding
+    new = {
+        keys[i]: embedding.tobytes() for i, embedding in zip(missing, computed)
+        if embedding is not None and keys[i] is not None
+    }
+    # Sourced by real path, so re-embedding an edited image replaces its stale rows
+    await asyncio.to_thread(cache.put_many, new, {key: key.partition("\0")[0] for key in new})
+
+    with _embedding_memo_lock:
+        for key, embedding in zip(keys, embeddings):
+            if key is not None and embedding is not None:
+                _embedding_memo[(model_name, key)] = embedding
+                _embedding_memo.move_to_end((model_name, key))
+        while len(_embedding_memo) > EMBEDDING_MEMO_SIZE:
+            _embedding_memo.popitem(last=False)
+
+    return embeddings
+
+async def get_image_embedding(image_path: str, model_name: str = DEFAULT_MODEL) -> np.ndarray:
+    return (await get_image_embeddings([image_path], model_name))[0]
+
+
+async def find_similar_images(image_path: str = None, search_directory: str = None, top_k: int = 5, threshold: float = 0.5, **kwargs) -> list[dict]:
     """
     Finds the most visually similar images to a source image within a directory.
     This is a high-level tool that the LLM agent can call.
@@ -107,37 +280,52 @@ def find_similar_images(image_path: str = None, search_directory: str = None, to
 
     Spinner.set_message(self=Spinner, message=f"Finding images similar to '{image_path}' in '{search_directory}'...")
 
-    source_embedding = get_image_embedding(image_path)
+    source_embedding = await get_image_embedding(image_path)
     if source_embedding is None:
         return {"error": "Failed to generate embedding for the source image."}
     
-    similar_images = []
+    try:
+        source_stat = os.stat(image_path)
+    except OSError:
+        source_stat = None
+    source_abspath = os.path.abspath(image_path)
 
-    for filename in os.listdir(search_directory):
-        if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.webp', '.avif')):
-            candidate_path = os.path.join(search_directory, filename)
+    candidates = []
+    with os.scandir(search_directory) as it:
+        for entry in it:
+            name = entry.name
+            dot = name.rfind('.')
+            if dot < 0 or name[dot + 1:].lower() not in IMAGE_EXTENSIONS or not entry.is_file():
+                continue
 
-            # Skip if it's the same file as the source
-            try:
-                if os.path.samefile(image_path, candidate_path):
+            # Skip if it's the same file as the source. The inode number comes with the
+            # directory listing, so only an entry sharing the source's inode (or a symlink,
+            # whose target is unknown) costs a stat
+            if source_stat is not None:
+                if entry.is_symlink():
+                    if os.path.samestat(entry.stat(), source_stat):
+                        continue
+                elif entry.inode() == source_stat.st_ino and entry.stat(follow_symlinks=False).st_dev == source_stat.st_dev:
                     continue
-            except FileNotFoundError:
-                # If files don't exist, compare paths as strings
-                if os.path.abspath(image_path) == os.path.abspath(candidate_path):
-                    continue
-
-            Spinner.set_message(self=Spinner, message=f" - Analyzing {filename}...")
-            comparison_embedding = get_image_embedding(candidate_path)
+            elif os.path.abspath(entry.path) == source_abspath:
+                # If the source doesn't exist, compare paths as strings
+                continue
+            candidates.append(entry)
 
-            if comparison_embedding:
-                # Calculate similarity. Cosine distance is 1 - similarity.
-                # So, similarity = 1 - distance
-                similarity = 1 - cosine(source_embedding, comparison_embedding)
-                similar_images.append({"file": filename, "similarity": similarity})
+    names, embeddings = [], []
+    for entry, comparison_embedding in zip(candidates, await get_image_embeddings([entry.path for entry in candidates])):
+        if comparison_embedding is not None:
+            names.append(entry.name)
+            embeddings.append(comparison_embedding)
+    if not embeddings:
+        return []
 
-    # Sort the results by similarity score, highest first
-    similar_images.sort(key=lambda x: x["similarity"], reverse=True)
+    # Embeddings are unit length, so one matrix-vector product gives every cosine similarity
+    similarities = np.stack(embeddings) @ source_embedding
 
-    # Only return images above the threshold, up to top_k
-    filtered = [img for img in similar_images if img["similarity"] >= threshold]
-    return filtered[:top_k]
\ No newline at end of file
+    # Only return images above the threshold, up to top_k, highest similarity first
+    above = np.flatnonzero(similarities >= threshold)
+    if len(above) > top_k > 0:
+        above = above[np.argpartition(-similarities[above], top_k - 1)[:top_k]]
+    order = above[np.argsort(-similarities[above], kind="stable")][:top_k]
+    return [{"file": names[i], "similarity": float(similarities[i])} for i in order]
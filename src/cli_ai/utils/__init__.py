@@ -1,4 +1,5 @@
-from .database import initialize_db, save_memory, recall_memories
+from .database import initialize_db, save_memory, save_memories, recall_memories
+from .embeddings import EmbeddingCache, get_embedding_device
 from .os_helpers import get_os_info
 from .spinner import Spinner
 from .directory_manager import directory_manager
@@ -8,7 +9,10 @@ from .task_progress import analyze_task_progress
 __all__ = [
     "initialize_db",
     "save_memory", 
+    "save_memories",
     "recall_memories",
+    "EmbeddingCache",
+    "get_embedding_device",
     "get_os_info",
     "Spinner",
     "directory_manager",
@@ -1,20 +1,169 @@
 
+import atexit
+import os
 import sqlite3
 import json
+import threading
+import time
 import numpy as np
 import faiss
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
 
-DB_FILE = "agent_memory.db"
+# Overridable so tests can point the database at tmpfs
+DB_FILE = os.getenv("CLI_AI_DB", "agent_memory.db")
 FAISS_INDEX = None  # Global FAISS index
+# Guards FAISS adds/searches and the parallel sqlite_ids/timestamps lists, so memories can be
+# saved and recalled from worker threads while embedding runs concurrently outside the lock
+FAISS_LOCK = threading.Lock()
 EMBEDDING_DIM = 384  # Dimension of 'all-MiniLM-L6-v2' embeddings
 
+# "hnsw" (default): approximate, O(log N) search for a memory store that grows without bound.
+# "flat": exact brute-force search, for tests that assert exact recall.
+# "sq8": exact search over 8-bit scalar-quantized vectors - 4x less index RAM than float32.
+FAISS_INDEX_KIND = os.getenv("FAISS_INDEX_KIND", "hnsw").lower()
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# The index is persisted next to the database (DB_FILE + ".faiss") so startup does not
+# rebuild it from every stored embedding. Writing it is O(index size), so it happens only
+# after a rebuild, on /reset and at exit, never on the path of an individual save
+_unflushed_adds = 0
+
 def get_db_connection():
     """Establishes a connection to the SQLite database."""
     conn = sqlite3.connect(DB_FILE)
     conn.row_factory = sqlite3.Row
     return conn
 
+def _to_epoch(timestamp: Optional[str]) -> float:
+    """Convert a stored timestamp (SQLite CURRENT_TIMESTAMP, i.e. UTC) to epoch seconds."""
+    if not timestamp:
+        return time.time()
+    try:
+        parsed = datetime.fromisoformat(str(timestamp).replace('Z', '+00:00'))
+    except ValueError:
+        return time.time()
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def _create_index():
+    """
+    Create an empty FAISS index of the configured FAISS_INDEX_KIND.
+    
+    All kinds use inner product over L2-normalized vectors, so search scores are
+    cosine similarities directly - no distance-to-similarity conversion needed.
+    """
+    if FAISS_INDEX_KIND == "flat":
+        index = faiss.IndexFlatIP(EMBEDDING_DIM)
+    elif FAISS_INDEX_KIND == "sq8":
+        index = faiss.IndexScalarQuantizer(EMBEDDING_DIM, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        # Components of unit vectors lie in [-1, 1]; training on those bounds fixes the
+        # quantization range up front, so no later vector is ever clipped
+        bounds = np.vstack([
+            np.full(EMBEDDING_DIM, -1.0, dtype=np.float32),
+            np.full(EMBEDDING_DIM, 1.0, dtype=np.float32)
+        ])
+        index.train(bounds)
+    else:
+        index = faiss.IndexHNSWFlat(EMBEDDING_DIM, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    index.sqlite_ids = []
+    index.timestamps = []
+    # Rows with an embedding that the index has accounted for (added, or skipped for a wrong
+    # dimension) and the largest such id; the persisted copy is stale once these disagree
+    # with the memories table
+    index.covered_rows = 0
+    index.covered_max_id = 0
+    return index
+
+def _cover_rows(memory_ids: List[int]):
+    """Record rows with embeddings as accounted for by the index. Call with FAISS_LOCK held."""
+    global _unflushed_adds
+    if memory_ids:
+        FAISS_INDEX.covered_rows += len(memory_ids)
+        FAISS_INDEX.covered_max_id = max(FAISS_INDEX.covered_max_id, max(memory_ids))
+        _unflushed_adds += len(memory_ids)
+
+def _prepare_vectors(vectors: np.ndarray) -> np.ndarray:
+    """Return an (n, EMBEDDING_DIM) float32 copy of vectors, L2-normalized in place for FAISS."""
+    prepared = np.array(vectors, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+    faiss.normalize_L2(prepared)
+    return prepared
+
+def _index_paths() -> Tuple[str, str]:
+    """Paths of the persisted FAISS index and its sqlite_ids/timestamps sidecar."""
+    index_file = DB_FILE + ".faiss"
+    return index_file, index_file + ".ids.npz"
+
+def _load_persisted_index(conn):
+    """Load the persisted FAISS index if it still matches the memories table, else return None."""
+    index_file, ids_file = _index_paths()
+    if not (os.path.exists(index_file) and os.path.exists(ids_file)):
+        return None
+    try:
+        with np.load(ids_file) as sidecar:
+            sqlite_ids = sidecar['ids'].tolist()
+            timestamps = sidecar['timestamps'].tolist()
+            kind = str(sidecar['kind'])
+            covered_rows = int(sidecar['covered_rows'])
+            covered_max_id = int(sidecar['covered_max_id'])
+        if kind != FAISS_INDEX_KIND:
+            return None
+        # Rows added or deleted behind the index's back mean it is stale. Compared against
+        # the rows the index accounted for, not the vectors it holds, so rows skipped for a
+        # wrong dimension do not force a rebuild on every startup
+        count, max_id = conn.execute("SELECT COUNT(*), MAX(id) FROM memories WHERE embedding IS NOT NULL").fetchone()
+        if covered_rows != count or covered_max_id != (max_id or 0):
+            return None
+        index = faiss.read_index(index_file)
+        if index.ntotal != len(sqlite_ids):
+            return None
+    except Exception as e:
+        print(f"Warning: Could not load persisted FAISS index ({e}). Rebuilding.")
+        return None
+    if kind == "hnsw":
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+    index.sqlite_ids = sqlite_ids
+    index.timestamps = timestamps
+    index.covered_rows = covered_rows
+    index.covered_max_id = covered_max_id
+    return index
+
+def flush_index():
+    """Write the FAISS index and its sqlite_ids/timestamps sidecar next to the database."""
+    global _unflushed_adds
+    if FAISS_INDEX is None:
+        return
+    index_file, ids_file = _index_paths()
+    try:
+        with FAISS_LOCK:
+            # Write to temp files and rename so a crash never leaves a torn index behind
+            faiss.write_index(FAISS_INDEX, index_file + ".tmp")
+            with open(ids_file + ".tmp", 'wb') as f:
+                np.savez(
+                    f,
+                    ids=np.array(FAISS_INDEX.sqlite_ids, dtype=np.int64),
+                    timestamps=np.array(FAISS_INDEX.timestamps, dtype=np.float64),
+                    kind=np.array(FAISS_INDEX_KIND),
+                    covered_rows=np.array(FAISS_INDEX.covered_rows, dtype=np.int64),
+                    covered_max_id=np.array(FAISS_INDEX.covered_max_id, dtype=np.int64)
+                )
+            os.replace(index_file + ".tmp", index_file)
+            os.replace(ids_file + ".tmp", ids_file)
+            _unflushed_adds = 0
+    except Exception as e:
+        print(f"Warning: Could not persist FAISS index: {e}")
+
+@atexit.register
+def flush_pending_index():
+    """Persist the index if anything was added since it was last written (at exit and on /reset)."""
+    if _unflushed_adds:
+        flush_index()
+
 def initialize_db():
     """Initializes the database with the required tables and loads/builds the FAISS index."""
     global FAISS_INDEX
@@ -31,14 +180,23 @@ def initialize_db():
     """)
     conn.commit()
 
+    persisted_index = _load_persisted_index(conn)
+    if persisted_index is not None:
+        FAISS_INDEX = persisted_index
+        print(f"FAISS index loaded with {FAISS_INDEX.ntotal} embeddings.")
+        conn.close()
+        return
+
     # Load existing embeddings and build FAISS index
-    c.execute("SELECT id, embedding FROM memories WHERE embedding IS NOT NULL")
+    c.execute("SELECT id, embedding, timestamp FROM memories WHERE embedding IS NOT NULL")
     rows = c.fetchall()
+    covered_ids = [row['id'] for row in rows]
     
     if rows:
         # Filter out rows with None embeddings and convert to numpy array
         valid_embeddings = []
         valid_ids = []
+        valid_timestamps = []
         for row in rows:
             if row['embedding'] is not None:
                 try:
@@ -46,38 +204,60 @@ def initialize_db():
                     if embedding_array.shape[0] == EMBEDDING_DIM:
                         valid_embeddings.append(embedding_array)
                         valid_ids.append(row['id'])
+                        valid_timestamps.append(_to_epoch(row['timestamp']))
                     else:
                         print(f"Warning: Embedding for ID {row['id']} has incorrect dimension {embedding_array.shape[0]}. Expected {EMBEDDING_DIM}. Skipping.")
                 except ValueError as e:
                     print(f"Warning: Could not convert embedding for ID {row['id']} to numpy array: {e}. Skipping.")
         
         if valid_embeddings:
-            embeddings_matrix = np.array(valid_embeddings).astype('float32')
-            FAISS_INDEX = faiss.IndexFlatL2(EMBEDDING_DIM)
+            embeddings_matrix = _prepare_vectors(np.array(valid_embeddings))
+            FAISS_INDEX = _create_index()
             FAISS_INDEX.add(embeddings_matrix)
             # Store mapping from FAISS index to SQLite ID
             FAISS_INDEX.sqlite_ids = valid_ids
+            # Insert times (epoch seconds), parallel to sqlite_ids, for vectorized recency scoring
+            FAISS_INDEX.timestamps = valid_timestamps
             print(f"FAISS index built with {FAISS_INDEX.ntotal} embeddings.")
         else:
-            FAISS_INDEX = faiss.IndexFlatL2(EMBEDDING_DIM)
-            FAISS_INDEX.sqlite_ids = []
+            FAISS_INDEX = _create_index()
             print("No valid embeddings found to build FAISS index. Initializing empty index.")
     else:
-        FAISS_INDEX = faiss.IndexFlatL2(EMBEDDING_DIM)
-        FAISS_INDEX.sqlite_ids = []
+        FAISS_INDEX = _create_index()
         print("No existing memories. Initializing empty FAISS index.")
+    with FAISS_LOCK:
+        _cover_rows(covered_ids)
     
     conn.close()
+    flush_index()
 
-def save_memory(content: str, embedding: Optional[bytes] = None, metadata: Optional[Dict[str, Any]] = None):
-    """Saves a memory to the database and adds its embedding to the FAISS index."""
+def save_memory(content: str, embedding: Optional[bytes] = None, metadata: Optional[Dict[str, Any]] = None,
+                timestamp: Optional[datetime] = None):
+    """
+    Saves a memory to the database and adds its embedding to the FAISS index.
+    
+    timestamp dates the memory (naive datetimes are local time); it defaults to now.
+    """
     global FAISS_INDEX
+    if timestamp is None:
+        created_at = time.time()
+        stored_timestamp = None
+    else:
+        created_at = timestamp.timestamp()
+        # Same UTC format SQLite uses for CURRENT_TIMESTAMP
+        stored_timestamp = datetime.fromtimestamp(created_at, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
     conn = get_db_connection()
     c = conn.cursor()
-    c.execute(
-        "INSERT INTO memories (content, embedding, metadata) VALUES (?, ?, ?)",
-        (content, embedding, json.dumps(metadata) if metadata else None)
-    )
+    if stored_timestamp is None:
+        c.execute(
+            "INSERT INTO memories (content, embedding, metadata) VALUES (?, ?, ?)",
+            (content, embedding, json.dumps(metadata) if metadata else None)
+        )
+    else:
+        c.execute(
+            "INSERT INTO memories (content, embedding, metadata, timestamp) VALUES (?, ?, ?, ?)",
+            (content, embedding, json.dumps(metadata) if metadata else None, stored_timestamp)
+        )
     memory_id = c.lastrowid
     conn.commit()
     conn.close()
@@ -86,14 +266,94 @@ def save_memory(content: str, embedding: Optional[bytes] = None, metadata: Optio
         try:
             embedding_array = np.frombuffer(embedding, dtype=np.float32).reshape(1, -1)
             if embedding_array.shape[1] == EMBEDDING_DIM:
-                FAISS_INDEX.add(embedding_array)
-                FAISS_INDEX.sqlite_ids.append(memory_id)
+                with FAISS_LOCK:
+                    FAISS_INDEX.add(_prepare_vectors(embedding_array))
+                    FAISS_INDEX.sqlite_ids.append(memory_id)
+                    FAISS_INDEX.timestamps.append(created_at)
             else:
                 print(f"Warning: New embedding for ID {memory_id} has incorrect dimension {embedding_array.shape[1]}. Expected {EMBEDDING_DIM}. Not added to FAISS index.")
         except ValueError as e:
             print(f"Warning: Could not convert new embedding for ID {memory_id} to numpy array: {e}. Not added to FAISS index.")
+        with FAISS_LOCK:
+            _cover_rows([memory_id])
+
+def save_memories(contents: List[str], embeddings: List[Optional[bytes]], metadatas: Optional[List[Optional[Dict[str, Any]]]] = None):
+    """Saves several memories in one transaction and adds their embeddings to the FAISS index in one call."""
+    global FAISS_INDEX
+    if metadatas is None:
+        metadatas = [None] * len(contents)
+    conn = get_db_connection()
+    c = conn.cursor()
+    memory_ids = []
+    for content, embedding, metadata in zip(contents, embeddings, metadatas):
+        c.execute(
+            "INSERT INTO memories (content, embedding, metadata) VALUES (?, ?, ?)",
+            (content, embedding, json.dumps(metadata) if metadata else None)
+        )
+        memory_ids.append(c.lastrowid)
+    conn.commit()
+    conn.close()
+
+    if FAISS_INDEX is None:
+        return
+
+    vectors = []
+    vector_ids = []
+    for memory_id, embedding in zip(memory_ids, embeddings):
+        if embedding is None:
+            continue
+        embedding_array = np.frombuffer(embedding, dtype=np.float32)
+        if embedding_array.shape[0] == EMBEDDING_DIM:
+            vectors.append(embedding_array)
+            vector_ids.append(memory_id)
+        else:
+            print(f"Warning: New embedding for ID {memory_id} has incorrect dimension {embedding_array.shape[0]}. Expected {EMBEDDING_DIM}. Not added to FAISS index.")
+
+    with FAISS_LOCK:
+        if vectors:
+            FAISS_INDEX.add(_prepare_vectors(np.vstack(vectors)))
+            FAISS_INDEX.sqlite_ids.extend(vector_ids)
+            FAISS_INDEX.timestamps.extend([time.time()] * len(vector_ids))
+        _cover_rows([memory_id for memory_id, embedding in zip(memory_ids, embeddings) if embedding is not None])
 
 
+def search_memory_vectors(query_embedding: bytes, limit: int) -> Tuple[List[int], np.ndarray, np.ndarray]:
+    """
+    Nearest-neighbour search over the FAISS index without touching SQLite.
+    
+    Returns:
+        (sqlite_ids, similarities, timestamps) for the hits in FAISS order; similarities
+        are cosine similarities and timestamps are insert times in epoch seconds.
+    """
+    empty = ([], np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float64))
+    if FAISS_INDEX is None or FAISS_INDEX.ntotal == 0:
+        return empty
+
+    query_vector = np.frombuffer(query_embedding, dtype=np.float32).reshape(1, -1)
+    if query_vector.shape[1] != EMBEDDING_DIM:
+        print(f"Error: Query embedding dimension {query_vector.shape[1]} does not match FAISS index dimension {EMBEDDING_DIM}.")
+        return empty
+
+    with FAISS_LOCK:
+        similarities, faiss_indices = FAISS_INDEX.search(_prepare_vectors(query_vector), limit)
+        found = faiss_indices[0] != -1
+        positions = faiss_indices[0][found]
+        sqlite_ids = [FAISS_INDEX.sqlite_ids[i] for i in positions]
+        timestamps = np.array([FAISS_INDEX.timestamps[i] for i in positions], dtype=np.float64)
+    return sqlite_ids, similarities[0][found], timestamps
+
+def get_memories_by_ids(memory_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Fetch memory rows by ID, keyed by ID."""
+    if not memory_ids:
+        return {}
+    conn = get_db_connection()
+    c = conn.cursor()
+    placeholders = ','.join('?' * len(memory_ids))
+    c.execute(f"SELECT * FROM memories WHERE id IN ({placeholders})", list(memory_ids))
+    rows = {row['id']: dict(row) for row in c.fetchall()}
+    conn.close()
+    return rows
+
 def recall_memories(query_embedding: Optional[bytes] = None, limit: int = 10) -> List[Dict[str, Any]]:
     """Recalls memories from the database using FAISS for semantic search."""
     global FAISS_INDEX
@@ -108,11 +368,12 @@ def recall_memories(query_embedding: Optional[bytes] = None, limit: int = 10) ->
                 return []
 
             # Perform FAISS search
-            distances, faiss_indices = FAISS_INDEX.search(query_vector, limit)
-            
-            # Retrieve memories from SQLite based on FAISS results
-            # faiss_indices can contain -1 if not enough results are found
-            sqlite_ids_to_fetch = [FAISS_INDEX.sqlite_ids[idx] for idx in faiss_indices[0] if idx != -1]
+            with FAISS_LOCK:
+                _, faiss_indices = FAISS_INDEX.search(_prepare_vectors(query_vector), limit)
+                
+                # Retrieve memories from SQLite based on FAISS results
+                # faiss_indices can contain -1 if not enough results are found
+                sqlite_ids_to_fetch = [FAISS_INDEX.sqlite_ids[idx] for idx in faiss_indices[0] if idx != -1]
             
             if sqlite_ids_to_fetch:
                 # Use a parameterized query to fetch multiple IDs
@@ -123,13 +384,7 @@ def recall_memories(query_embedding: Optional[bytes] = None, limit: int = 10) ->
                 # Sort memories by their original FAISS search order for relevance
                 # Create a mapping from sqlite_id to memory dict for efficient sorting
                 memory_map = {m['id']: m for m in memories}
-                sorted_memories = []
-                for faiss_idx in faiss_indices[0]:
-                    if faiss_idx != -1:
-                        sqlite_id = FAISS_INDEX.sqlite_ids[faiss_idx]
-                        if sqlite_id in memory_map:
-                            sorted_memories.append(memory_map[sqlite_id])
-                memories = sorted_memories
+                memories = [memory_map[sqlite_id] for sqlite_id in sqlite_ids_to_fetch if sqlite_id in memory_map]
             else:
                 print("FAISS search returned no valid results.")
         except Exception as e:
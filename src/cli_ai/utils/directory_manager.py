@@ -2,11 +2,13 @@
 Directory Manager - Shared working directory state across the application
 """
 import os
+from typing import Optional
 
 class DirectoryManager:
     """Singleton class to manage the current working directory across the application"""
     _instance = None
     _current_directory = None
+    _directory_fd = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -23,6 +25,7 @@ class DirectoryManager:
     def current_directory(self, path: str):
         """Set the current working directory"""
         if os.path.isdir(path):
+            self.release_directory_fd()
             self._current_directory = os.path.abspath(path)
         else:
             raise ValueError(f"Directory does not exist: {path}")
@@ -38,6 +41,7 @@ class DirectoryManager:
             target_path = os.path.normpath(target_path)
             
             if os.path.isdir(target_path):
+                self.release_directory_fd()
                 self._current_directory = target_path
                 return True
             else:
@@ -45,6 +49,25 @@ class DirectoryManager:
         except Exception:
             return False
     
+    def directory_fd(self) -> Optional[int]:
+        """
+        Open descriptor for the current directory, kept until the directory changes, so
+        repeated lookups in it skip resolving the full path. None where directory
+        descriptors are unsupported or the directory cannot be opened.
+        """
+        if self._directory_fd is None and hasattr(os, "O_DIRECTORY"):
+            try:
+                self._directory_fd = os.open(self._current_directory, os.O_RDONLY | os.O_DIRECTORY)
+            except OSError:
+                return None
+        return self._directory_fd
+    
+    def release_directory_fd(self):
+        """Close the cached directory descriptor; the next directory_fd() call reopens it"""
+        if self._directory_fd is not None:
+            os.close(self._directory_fd)
+            self._directory_fd = None
+    
     def get_absolute_path(self, relative_path: str = ".") -> str:
         """Get absolute path relative to current directory"""
         if os.path.isabs(relative_path):
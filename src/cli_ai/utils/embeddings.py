@@ -0,0 +1,214 @@
+"""
+Embedding Cache - Persistent text -> embedding storage shared across runs
+
+Sentence-transformer forward passes dominate memory save/recall time, and the
+same strings (test fixtures, repeated user utterances) are embedded over and
+over. Embeddings are stored in a small SQLite file keyed by the SHA-1 of the
+text and the model name, so a string is only ever encoded once per model. Image
+embeddings use the same store, keyed by the file's real path and modification time.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+# Keys per SELECT ... IN (...): stays under SQLite's default host-parameter limit
+_LOOKUP_CHUNK = 500
+
+# Every distinct utterance and every (image path, mtime) adds a row, so the cache expires
+# rows and keeps only the newest; pruning runs at startup and after every _PRUNE_EVERY stores
+EMBEDDING_CACHE_MAX_ROWS = 20000
+EMBEDDING_CACHE_MAX_AGE_DAYS = 90
+_PRUNE_EVERY = 256
+
+EMBEDDING_CACHE_FILE = os.getenv(
+    "CLI_AI_EMBEDDING_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "cli_ai", "embeddings.db")
+)
+
+
+def get_embedding_device() -> str:
+    """
+    Device for sentence-transformer encoding: CLI_AI_EMBED_DEVICE if set (e.g. "cpu" for
+    reproducible tests), otherwise CUDA, then Apple MPS, then CPU.
+    """
+    device = os.getenv("CLI_AI_EMBED_DEVICE")
+    if device:
+        return device
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    if torch.cuda.is_available():
+        return "cuda"
+    mps = getattr(torch.backends, "mps", None)
+    if mps is not None and mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of raw float32 embedding bytes for one embedding model.
+
+    Holds one connection for its lifetime, shared by the worker threads that embed
+    concurrently and serialized by a lock. Rows expire after EMBEDDING_CACHE_MAX_AGE_DAYS
+    and the file keeps at most EMBEDDING_CACHE_MAX_ROWS of the newest, pruned every
+    _PRUNE_EVERY stores.
+    """
+
+    def __init__(self, model_name: str, db_path: str = EMBEDDING_CACHE_FILE):
+        self.model_name = model_name
+        self.db_path = db_path
+        self.enabled = True
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._stores_since_prune = 0
+        try:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS embeddings (
+                        text_hash TEXT NOT NULL,
+                        model TEXT NOT NULL,
+                        embedding BLOB NOT NULL,
+                        created_at REAL NOT NULL DEFAULT 0,
+                        source TEXT,
+                        PRIMARY KEY (text_hash, model)
+                    )
+                """)
+                columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+                if "created_at" not in columns:
+                    # Caches written before rows were dated: date them now rather than drop them
+                    self._conn.execute("ALTER TABLE embeddings ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+                    self._conn.execute("UPDATE embeddings SET created_at = ?", (time.time(),))
+                if "source" not in columns:
+                    self._conn.execute("ALTER TABLE embeddings ADD COLUMN source TEXT")
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_created_at ON embeddings (created_at)")
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_source ON embeddings (model, source)")
+            self._prune()
+        except (OSError, sqlite3.Error) as e:
+            # A read-only or missing cache dir must never break memory features
+            print(f"Warning: Embedding cache disabled ({db_path}): {e}")
+            self.enabled = False
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def close(self):
+        """Close the cache's connection; later calls behave as if the cache were disabled."""
+        with self._lock:
+            self.enabled = False
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _prune(self):
+        """Drop expired rows and all but the newest EMBEDDING_CACHE_MAX_ROWS."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE created_at < ?",
+                (time.time() - EMBEDDING_CACHE_MAX_AGE_DAYS * 86400,)
+            )
+            self._conn.execute("""
+                DELETE FROM embeddings WHERE rowid IN (
+                    SELECT rowid FROM embeddings ORDER BY created_at DESC, rowid DESC LIMIT -1 OFFSET ?
+                )
+            """, (EMBEDDING_CACHE_MAX_ROWS,))
+            self._stores_since_prune = 0
+
+    def _store(self, rows: list):
+        """
+        Insert (text_hash, embedding, source) rows in one transaction, pruning every
+        _PRUNE_EVERY rows. A row with a source replaces every older row of that source.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            sources = {source for _, _, source in rows if source is not None}
+            if sources:
+                self._conn.executemany(
+                    "DELETE FROM embeddings WHERE model = ? AND source = ?",
+                    [(self.model_name, source) for source in sources]
+                )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (text_hash, model, embedding, created_at, source) VALUES (?, ?, ?, ?, ?)",
+                [(text_hash, self.model_name, embedding, now, source) for text_hash, embedding, source in rows]
+            )
+            self._stores_since_prune += len(rows)
+            due = self._stores_since_prune >= _PRUNE_EVERY
+        if due:
+            self._prune()
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def get(self, text: str) -> Optional[bytes]:
+        """Return the cached embedding for text, or None on a miss."""
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT embedding FROM embeddings WHERE text_hash = ? AND model = ? AND created_at >= ?",
+                    (self._key(text), self.model_name, time.time() - EMBEDDING_CACHE_MAX_AGE_DAYS * 86400)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Warning: Could not read embedding cache: {e}")
+            return None
+        return row[0] if row else None
+
+    def get_many(self, texts: Iterable[str]) -> Dict[str, bytes]:
+        """Return the cached embeddings among texts, keyed by text; misses are left out."""
+        if not self.enabled:
+            return {}
+        by_key = {self._key(text): text for text in texts}
+        keys = list(by_key)
+        found = {}
+        oldest = time.time() - EMBEDDING_CACHE_MAX_AGE_DAYS * 86400
+        try:
+            with self._lock:
+                for start in range(0, len(keys), _LOOKUP_CHUNK):
+                    chunk = keys[start:start + _LOOKUP_CHUNK]
+                    rows = self._conn.execute(
+                        f"SELECT text_hash, embedding FROM embeddings WHERE model = ? AND created_at >= ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                        (self.model_name, oldest, *chunk)
+                    ).fetchall()
+                    found.update((by_key[text_hash], embedding) for text_hash, embedding in rows)
+        except sqlite3.Error as e:
+            print(f"Warning: Could not read embedding cache: {e}")
+        return found
+
+    def put(self, text: str, embedding: bytes):
+        """Store the embedding computed for text."""
+        if not self.enabled:
+            return
+        try:
+            self._store([(self._key(text), embedding, None)])
+        except sqlite3.Error as e:
+            print(f"Warning: Could not write embedding cache: {e}")
+
+    def put_many(self, embeddings: Dict[str, bytes], sources: Optional[Dict[str, str]] = None):
+        """
+        Store several computed embeddings in one transaction. `sources` optionally maps a
+        text to what it was derived from (e.g. an image's path); storing it drops the
+        rows earlier versions of that source left behind.
+        """
+        if not self.enabled or not embeddings:
+            return
+        try:
+            sources = sources or {}
+            self._store([(self._key(text), embedding, sources.get(text)) for text, embedding in embeddings.items()])
+        except sqlite3.Error as e:
+            print(f"Warning: Could not write embedding cache: {e}")
+
+    def get_or_compute(self, text: str, encode: Callable[[str], bytes]) -> bytes:
+        """Return the cached embedding for text, encoding and storing it on a miss."""
+        embedding = self.get(text)
+        if embedding is None:
+            embedding = encode(text)
+            self.put(text, embedding)
+        return embedding
@@ -1,4 +1,5 @@
 import sys
+import asyncio
 import itertools
 import threading
 import time
@@ -7,31 +8,75 @@ from colorama import Fore, init
 init(autoreset=True)
 
 class Spinner:
-    def __init__(self, message: str):
-        self.spinner = itertools.cycle(["-", "/", "|", "\\"])
-        self.message = message
+    """
+    Terminal spinner. Started from a coroutine it animates as a task on the running event
+    loop, which already sits idle while the agent awaits the LLM or a tool; elsewhere, or
+    with threaded=True for callers that block the loop (e.g. audio capture), it uses a thread.
+    """
+
+    FRAMES = ("-", "/", "|", "\\")
+
+    def __init__(self, message: str, threaded: bool = False):
+        self.spinner = itertools.cycle(range(len(self.FRAMES)))
+        self.set_message(message)
+        self.threaded = threaded
         self.running = False
         self.thread = None
+        self.task = None
+        self._stop_event = None
+
+    def _write_frame(self):
+        sys.stdout.write(self._frames[next(self.spinner)])
+        sys.stdout.flush()
+
+    def _clear(self):
+        sys.stdout.write(self._clear_line)
+        sys.stdout.flush()
 
     def _spin(self):
         while self.running:
-            sys.stdout.write(f"\r{Fore.YELLOW}{self.message} {next(self.spinner)}")
-            sys.stdout.flush()
+            self._write_frame()
             time.sleep(0.1)
         # Clear the line completely after stopping
-        sys.stdout.write(f"\r{' ' * (len(self.message) + 2)}\r")
-        sys.stdout.flush()
+        self._clear()
+
+    async def _spin_async(self, stop_event: asyncio.Event):
+        while not stop_event.is_set():
+            self._write_frame()
+            try:
+                await asyncio.wait_for(stop_event.wait(), 0.1)
+            except asyncio.TimeoutError:
+                pass
 
     def start(self):
         self.running = True
+        if not self.threaded:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is not None:
+                # Each run gets its own event, so a stop() followed by start() never revives the old task
+                self._stop_event = asyncio.Event()
+                self.task = loop.create_task(self._spin_async(self._stop_event))
+                return
         self.thread = threading.Thread(target=self._spin)
         self.thread.start()
 
     def stop(self):
         self.running = False
+        if self.task:
+            # The task only writes while it holds the loop, which it does not now; clear the
+            # line here so output printed right after stop() is never overwritten
+            self._stop_event.set()
+            self.task = None
+            self._clear()
         if self.thread:
             self.thread.join()
+            self.thread = None
 
     def set_message(self, message: str):
         self.message = message
-
+        # Every tick writes one prebuilt string; nothing is formatted while spinning
+        self._frames = [f"\r{Fore.YELLOW}{message} {frame}" for frame in self.FRAMES]
+        self._clear_line = f"\r{' ' * (len(message) + 2)}\r"
@@ -58,6 +58,16 @@ TASK_TRANSITION_PHRASES = [
     "instead", "actually", "change of plans"
 ]
 
+# Compiled once; is_task_continuation runs on every user input
+_WORD_RE = re.compile(r'\w+')
+
+# Openers that start a new task even when the input refers to current context
+_EXPLICIT_NEW_TASK_PREFIXES = tuple(
+    f"{opener} {keyword}"
+    for keyword in ["with something", "do something", "start"]
+    for opener in ("help me", "can you")
+)
+
 def is_task_continuation(user_input: str, current_task_memory: dict) -> bool:
     """
     Determine if the user input is continuing an existing task
@@ -91,9 +101,7 @@ def is_task_continuation(user_input: str, current_task_memory: dict) -> bool:
     if has_contextual_ref:
         # If it has contextual references, it's very likely a continuation
         # unless it's explicitly starting a completely new task
-        explicit_new_task = any(user_lower.startswith(f"help me {keyword}") or 
-                               user_lower.startswith(f"can you {keyword}") 
-                               for keyword in ["with something", "do something", "start"])
+        explicit_new_task = user_lower.startswith(_EXPLICIT_NEW_TASK_PREFIXES)
         return not explicit_new_task
     
     # Check for task transition phrases (these override continuation keywords)
@@ -116,8 +124,8 @@ def is_task_continuation(user_input: str, current_task_memory: dict) -> bool:
     current_task = current_task_memory.get("original_request", "").lower()
     if current_task and len(current_task) > 10:
         # Simple similarity check - count common words
-        current_words = set(re.findall(r'\w+', current_task))
-        input_words = set(re.findall(r'\w+', user_lower))
+        current_words = set(_WORD_RE.findall(current_task))
+        input_words = set(_WORD_RE.findall(user_lower))
         common_words = current_words.intersection(input_words)
         
         # If more than 30% of words are common, likely continuation
@@ -5,6 +5,7 @@ Provides persistent task memory and intelligent planning to prevent redundant ac
 and maintain context across multi-step tasks.
 """
 
+import itertools
 import json
 import uuid
 from datetime import datetime
@@ -77,6 +78,11 @@ class Observation:
         )
 
 
+# Workspace versions come from one process-wide counter, so (task_id, version) names a
+# single state even across two instances of one task (e.g. one reloaded with from_dict)
+_versions = itertools.count(1)
+
+
 class TaskWorkspace:
     """
     Persistent workspace for a single task execution.
@@ -85,7 +91,15 @@ class TaskWorkspace:
     to prevent redundant operations and enable smarter decision making.
     """
     
+    # Assigning any of these gives the workspace a new version
+    _VERSIONED_FIELDS = frozenset({
+        "task_id", "original_request", "current_goal", "actions_taken", "observations",
+        "accumulated_knowledge", "progress_state", "next_steps"
+    })
+    
     def __init__(self, task_id: str = None, original_request: str = ""):
+        # Changed on every mutation; prompt builders key their caches on (task_id, version)
+        self.version = 0
         self.task_id = task_id or str(uuid.uuid4())
         self.original_request = original_request
         self.current_goal = ""
@@ -96,6 +110,21 @@ class TaskWorkspace:
         self.next_steps: List[str] = []
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
+        # Formatted action history, reused until an action or observation is added
+        self._action_history_cache: Optional[str] = None
+        self._cache_version = (0, 0)
+    
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if name in self._VERSIONED_FIELDS:
+            if name in ("actions_taken", "observations"):
+                # Replaced wholesale, so the history cache's length check cannot be trusted
+                super().__setattr__("_action_history_cache", None)
+            self._bump_version()
+    
+    def _bump_version(self):
+        """Mark the workspace as changed; also call after mutating a versioned field in place."""
+        super().__setattr__("version", next(_versions))
     
     def add_action(self, tool: str, args: Dict[str, Any], thought: str, goal: str) -> str:
         """Add a new action to the workspace."""
@@ -109,6 +138,8 @@ class TaskWorkspace:
             goal=goal
         )
         self.actions_taken.append(action)
+        self._action_history_cache = None
+        self._bump_version()
         self.current_goal = goal
         self.updated_at = datetime.now()
         return action_id
@@ -125,12 +156,25 @@ class TaskWorkspace:
             extracted_info=extracted_info or {}
         )
         self.observations.append(observation)
+        self._action_history_cache = None
+        self._bump_version()
         self.updated_at = datetime.now()
         return observation_id
     
     def update_knowledge(self, key: str, value: Any):
         """Update accumulated knowledge."""
+        # Re-insert so the dict stays ordered from least to most recently updated
+        self.accumulated_knowledge.pop(key, None)
         self.accumulated_knowledge[key] = value
+        self._bump_version()
+        self.updated_at = datetime.now()
+    
+    def append_knowledge(self, key: str, subkey: str, value: Any):
+        """Set a single entry inside a dict-valued knowledge key in place."""
+        entry = self.accumulated_knowledge.pop(key, {})
+        entry[subkey] = value
+        self.accumulated_knowledge[key] = entry
+        self._bump_version()
         self.updated_at = datetime.now()
     
     def get_knowledge(self, key: str, default: Any = None) -> Any:
@@ -158,46 +202,60 @@ class TaskWorkspace:
                         return obs
         return None
     
-    def get_progress_summary(self) -> str:
-        """Generate a summary of progress so far."""
-        summary = f"Task: {self.original_request}\n"
-        summary += f"Current Goal: {self.current_goal}\n"
-        summary += f"Actions Taken: {len(self.actions_taken)}\n"
-        summary += f"Status: {self.progress_state}\n"
+    def get_progress_summary(self, max_knowledge_items: Optional[int] = None) -> str:
+        """
+        Generate a summary of progress so far.
+        
+        Args:
+            max_knowledge_items: Only include this many of the most recently updated knowledge entries
+        """
+        lines = [
+            f"Task: {self.original_request}",
+            f"Current Goal: {self.current_goal}",
+            f"Actions Taken: {len(self.actions_taken)}",
+            f"Status: {self.progress_state}",
+        ]
         
         if self.accumulated_knowledge:
-            summary += "\nAccumulated Knowledge:\n"
-            for key, value in self.accumulated_knowledge.items():
-                summary += f"  {key}: {value}\n"
+            lines.append("\nAccumulated Knowledge:")
+            knowledge_items = list(self.accumulated_knowledge.items())
+            if max_knowledge_items is not None:
+                knowledge_items = knowledge_items[-max_knowledge_items:]
+            lines.extend(f"  {key}: {value}" for key, value in knowledge_items)
         
         if self.next_steps:
-            summary += "\nNext Steps:\n"
-            for step in self.next_steps:
-                summary += f"  - {step}\n"
+            lines.append("\nNext Steps:")
+            lines.extend(f"  - {step}" for step in self.next_steps)
         
-        return summary
+        return "\n".join(lines) + "\n"
     
     def get_action_history_summary(self) -> str:
         """Get a summary of actions and their outcomes."""
         if not self.actions_taken:
             return "No actions taken yet."
         
-        summary = "Action History:\n"
+        # Phase 2 and reflexion both render this every turn; reuse it until something changes
+        version = (len(self.actions_taken), len(self.observations))
+        if self._action_history_cache is not None and self._cache_version == version:
+            return self._action_history_cache
+        
+        # First observation recorded for each action
+        observations_by_action: Dict[str, Observation] = {}
+        for observation in self.observations:
+            observations_by_action.setdefault(observation.action_id, observation)
+        
+        lines = ["Action History:"]
         for i, action in enumerate(self.actions_taken, 1):
-            # Find corresponding observation
-            obs = None
-            for observation in self.observations:
-                if observation.action_id == action.action_id:
-                    obs = observation
-                    break
-            
-            summary += f"{i}. {action.tool}({action.args}) - {action.thought}\n"
+            obs = observations_by_action.get(action.action_id)
+            lines.append(f"{i}. {action.tool}({action.args}) - {action.thought}")
             if obs:
-                summary += f"   → {obs.status}: {str(obs.output)[:100]}...\n"
+                lines.append(f"   → {obs.status}: {str(obs.output)[:100]}...")
             else:
-                summary += f"   → No observation recorded\n"
+                lines.append(f"   → No observation recorded")
         
-        return summary
+        self._action_history_cache = "\n".join(lines) + "\n"
+        self._cache_version = version
+        return self._action_history_cache
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert workspace to dictionary for serialization."""
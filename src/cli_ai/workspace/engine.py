@@ -5,6 +5,7 @@ This module provides enhanced agent intelligence by maintaining persistent task
 and making decisions based on accumulated knowledge and previous actions.
 """
 
+import asyncio
 import json
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
@@ -12,12 +13,28 @@ from datetime import datetime
 from ..core.ai_engine import get_client, print_prompt_debug, get_latest_user_input
 from ..utils.os_helpers import get_os_info
 from .prompts import (
+    _HISTORY_WINDOW,
+    format_history_line,
+    format_history_window,
     get_workspace_aware_need_assessment_prompt,
     get_workspace_aware_tool_selection_prompt,
     get_workspace_reflexion_prompt
 )
 from .core import TaskWorkspace, WorkspaceManager
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def _parse_json_response(content: str) -> dict:
+    """Parse an LLM JSON-mode reply, using orjson when it is installed."""
+    if HAS_ORJSON:
+        return orjson.loads(content)
+    return json.loads(content)
+
 
 class WorkspaceAwareEngine:
     """
@@ -27,6 +44,29 @@ class WorkspaceAwareEngine:
     def __init__(self, workspace_manager: WorkspaceManager = None):
         self.workspace_manager = workspace_manager or WorkspaceManager()
         self.current_workspace: Optional[TaskWorkspace] = None
+        # Formatted history lines carried across turns so only new messages are rendered
+        self._history_parts: List[str] = []
+    
+    def _get_history_str(self, history: list) -> str:
+        """
+        Return the prompt-ready history string, formatting only the messages
+        appended since the previous call.
+        
+        The cached lines are rebuilt when the history no longer extends what was
+        seen before (e.g. the session window slid or was flushed).
+        """
+        parts = self._history_parts
+        known = len(parts)
+        if known and (
+            known > len(history)
+            or parts[0] != format_history_line(history[0])
+            or parts[-1] != format_history_line(history[known - 1])
+        ):
+            parts.clear()
+            known = 0
+        
+        parts.extend(format_history_line(msg) for msg in history[known:])
+        return format_history_window(parts[-_HISTORY_WINDOW:], len(parts))
     
     async def think_with_workspace(
         self, 
@@ -44,6 +84,7 @@ class WorkspaceAwareEngine:
             (response_dict, task_id): The agent's response and the task ID for tracking
         """
         latest_user_message = get_latest_user_input(history)
+        history_str = self._get_history_str(history)
         
         # Determine if this is a new task or continuation
         if task_id:
@@ -60,10 +101,13 @@ class WorkspaceAwareEngine:
         
         if vector_memory_manager and latest_user_message:
             try:
+                # Embed the user message once and share it with every lookup this turn
+                query_embedding = vector_memory_manager.embed(latest_user_message)
                 relevant_contexts = vector_memory_manager.search_relevant_context(
                     query=latest_user_message,
                     limit=3,
-                    min_similarity=0.5
+                    min_similarity=0.5,
+                    embedding=query_embedding
                 )
                 for context in relevant_contexts:
                     recalled_memories.append({
@@ -87,54 +131,45 @@ class WorkspaceAwareEngine:
             "You are a cli-assistant that analyzes user requests with task memory.\n" + 
             get_os_info() + "\n" + 
             get_workspace_aware_need_assessment_prompt(
-                history, current_working_directory, recalled_memories, voice_input_enabled, workspace
+                history, current_working_directory, recalled_memories, voice_input_enabled, workspace,
+                precomputed_history_str=history_str
             )
         )
 
         print_prompt_debug(phase1_prompt, latest_user_message, "WORKSPACE PHASE 1: NEED ASSESSMENT")
 
-        try:
-            phase1_response = await get_client().chat.completions.create(
-                model="gpt-5-mini",
-                messages=[
-                    {"role": "system", "content": phase1_prompt},
-                    {"role": "user", "content": latest_user_message}
-                ],
-                response_format={"type": "json_object"}
+        # PHASE 2: Workspace-aware tool selection. Its prompt does not depend on the
+        # Phase 1 answer, so it is requested speculatively alongside Phase 1.
+        phase2_prompt = (
+            "You are a cli-assistant that executes tasks with workspace awareness.\n" + 
+            get_os_info() + "\n" + 
+            get_workspace_aware_tool_selection_prompt(
+                history, current_working_directory, latest_user_message, voice_input_enabled, workspace,
+                precomputed_history_str=history_str
             )
-            
-            phase1_result = json.loads(phase1_response.choices[0].message.content)
+        )
+
+        phase1_task = asyncio.create_task(self._request_json(phase1_prompt, latest_user_message))
+        phase2_task = asyncio.create_task(self._request_json(phase2_prompt, latest_user_message))
+        # Retrieve the outcome even when the speculative call is discarded
+        phase2_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+        try:
+            phase1_result = await phase1_task
             
             # Log the decision in workspace
             workspace.update_knowledge("phase1_decision", phase1_result)
             
-            # If no tools needed, return direct response
+            # If no tools needed, drop the speculative Phase 2 call and return direct response
             if not phase1_result.get("needs_tools", False):
+                phase2_task.cancel()
                 workspace.progress_state = "completed"
                 self.workspace_manager.update_workspace(workspace)
                 return {"text": phase1_result.get("response", "I understand, but I don't have a specific response.")}, task_id
-            
-            # PHASE 2: Workspace-aware tool selection
-            phase2_prompt = (
-                "You are a cli-assistant that executes tasks with workspace awareness.\n" + 
-                get_os_info() + "\n" + 
-                get_workspace_aware_tool_selection_prompt(
-                    history, current_working_directory, latest_user_message, voice_input_enabled, workspace
-                )
-            )
 
             print_prompt_debug(phase2_prompt, latest_user_message, "WORKSPACE PHASE 2: TOOL SELECTION")
 
-            phase2_response = await get_client().chat.completions.create(
-                model="gpt-5-mini",
-                messages=[
-                    {"role": "system", "content": phase2_prompt},
-                    {"role": "user", "content": latest_user_message}
-                ],
-                response_format={"type": "json_object"}
-            )
-            
-            phase2_result = json.loads(phase2_response.choices[0].message.content)
+            phase2_result = await phase2_task
             
             # If tools can't complete the task, return explanation
             if not phase2_result.get("can_complete", False):
@@ -172,6 +207,21 @@ class WorkspaceAwareEngine:
             workspace.update_knowledge("error", str(e))
             self.workspace_manager.update_workspace(workspace)
             return {"text": "Sorry, an error occurred while processing your request."}, task_id
+        finally:
+            if not phase2_task.done():
+                phase2_task.cancel()
+    
+    async def _request_json(self, system_prompt: str, user_message: str) -> dict:
+        """Send one JSON-mode chat completion and parse the reply."""
+        response = await get_client().chat.completions.create(
+            model="gpt-5-mini",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            response_format={"type": "json_object"}
+        )
+        return _parse_json_response(response.choices[0].message.content)
     
     def record_action_result(self, task_id: str, action_id: str, status: str, output: Any, extracted_info: Dict[str, Any] = None):
         """
@@ -200,9 +250,7 @@ class WorkspaceAwareEngine:
             
             # Extract image analysis results
             if "response" in output and "image_path" in output:
-                image_analyses = workspace.get_knowledge("image_analyses", {})
-                image_analyses[output["image_path"]] = output["response"]
-                workspace.update_knowledge("image_analyses", image_analyses)
+                workspace.append_knowledge("image_analyses", output["image_path"], output["response"])
     
     async def reflexion_with_workspace(
         self, 
@@ -237,7 +285,8 @@ class WorkspaceAwareEngine:
         
         # Use workspace-aware reflexion prompt
         system_prompt = get_workspace_reflexion_prompt(
-            history, current_goal, original_user_request, voice_input_enabled, workspace, relevant_memories
+            history, current_goal, original_user_request, voice_input_enabled, workspace, relevant_memories,
+            precomputed_history_str=self._get_history_str(history)
         )
 
         print_prompt_debug(system_prompt, latest_user_message, "WORKSPACE REFLEXION")
@@ -258,7 +307,7 @@ class WorkspaceAwareEngine:
                 print("LLM returned an empty response for reflexion.")
                 return {"decision": "error", "comment": "LLM returned an empty response during reflection."}
             
-            decision = json.loads(raw_response_content)
+            decision = _parse_json_response(raw_response_content)
             
             # Update workspace based on decision
             if decision.get("decision") == "finish":
@@ -6,10 +6,163 @@ and task progress to prevent redundant operations and improve efficiency.
 """
 
 import json
-from typing import List, Dict, Any, Optional
+from itertools import islice
+from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime
 from .core import TaskWorkspace
-from ..tools.tools import tools_schema, get_tool_docstrings
+from ..tools.tools import get_tools_schema_json, get_tool_docstrings
+
+
+_TOOLS_SCHEMA_JSON = get_tools_schema_json()
+
+# Rendered Phase 2 / reflexion prompts, keyed on their string inputs plus the workspace's
+# (task_id, version): a retry against unchanged state skips rendering the workspace
+# summaries, and the cache holds no reference to a workspace
+_PROMPT_CACHE_SIZE = 8
+_prompt_cache: Dict[tuple, str] = {}
+
+
+def _memoized_prompt(key: tuple, render: Callable[[], str]) -> str:
+    """Return the prompt cached under `key`, rendering (and caching) it on a miss."""
+    prompt = _prompt_cache.pop(key, None)
+    if prompt is None:
+        prompt = render()
+        if len(_prompt_cache) >= _PROMPT_CACHE_SIZE:
+            _prompt_cache.pop(next(iter(_prompt_cache)))
+    # Re-inserted so the dict stays ordered from least to most recently used
+    _prompt_cache[key] = prompt
+    return prompt
+
+# JSON example responses embedded in the prompts; serialized once at import
+_EXAMPLE_NEED_TOOLS_FALSE = json.dumps({"needs_tools": False, "reasoning": "The workspace already contains a list of files from previous list_directory action", "response": "Based on the directory listing I performed earlier, the assets/images folder contains 15 image files including cats, dogs, and landscapes."})
+_EXAMPLE_GREETING = json.dumps({"needs_tools": False, "reasoning": "This is a greeting that requires no system interaction", "response": "Hello! How can I help you today?"})
+_EXAMPLE_NEED_TOOLS_TRUE = json.dumps({"needs_tools": True, "reasoning": "User wants to analyze image content, which requires the describe_image tool", "response": ""})
+_EXAMPLE_CONTINUE = json.dumps({
+    "decision": "continue",
+    "comment": "I have the file list from the previous action. Now I need to analyze the first image to determine sorting categories.",
+    "next_action": {
+        "thought": "Analyze the first image to identify its content for creating sorting categories",
+        "current_goal": "Determine image content categories for sorting the assets/images files",
+        "tool": "describe_image",
+        "args": {"image_path": "assets/images/first_image.jpg", "question": "What animal or object is shown in this image?"},
+        "is_critical": False,
+        "workspace_reasoning": "Building on the file list obtained earlier, now categorizing images by content"
+    }
+})
+_EXAMPLE_FINISH = json.dumps({
+    "decision": "finish",
+    "comment": "I have successfully analyzed all images and sorted them into categories: Animals (deer, giraffe, fox), Landscapes (3 files), and Objects (2 files). The images are now organized by their primary content."
+})
+
+# Turn-independent part of the Phase 2 prompt. It is emitted before any per-turn
+# content so the provider-side prompt cache sees a stable prefix across turns.
+_TOOL_SELECTION_STATIC_PREFIX = f"""You are an expert autonomous agent that executes tasks using available tools with workspace awareness.
+
+**AVAILABLE TOOLS:**
+{_TOOLS_SCHEMA_JSON}
+
+The user request requires tools to complete. Analyze the available tools and workspace context to determine:
+1. Can you complete this task with the available tools?
+2. What is the logical first/next action based on workspace history?
+3. Are you avoiding redundant actions?
+
+If you CAN complete the task, respond with:
+{{
+    "can_complete": true,
+    "action": {{
+        "thought": "What you're thinking and why this action makes sense given workspace context",
+        "current_goal": "The specific goal for this step",
+        "tool": "tool_name_here",
+        "args": {{"parameter1": "value1", "parameter2": "value2"}},
+        "is_critical": true/false,
+        "original_user_request": "The Original User Request given below, copied verbatim"
+    }}
+}}
+
+If you CANNOT complete the task, respond with:
+{{
+    "can_complete": false,
+    "reasoning": "Explanation of why the task cannot be completed with available tools",
+    "suggestion": "Alternative approach or request for clarification"
+}}
+
+**Critical Instructions:**
+- ONLY use tools from the available tools list above
+- Use EXACT parameter names as shown in the tools schema
+- Consider workspace context to avoid repeating successful actions
+- Build logically on previous actions and knowledge
+"""
+
+# Turn-independent part of the reflexion prompt (see _TOOL_SELECTION_STATIC_PREFIX).
+_REFLEXION_STATIC_PREFIX = f"""You are a ReAct-style agent. You have just performed an action and observed the result.
+
+**AVAILABLE TOOLS:**
+{_TOOLS_SCHEMA_JSON}
+
+Your task is to analyze the observation and workspace context to decide whether the user request has been fulfilled or if further action is needed.
+
+**WORKSPACE-AWARE DECISION MAKING:**
+- Review the workspace to understand overall progress
+- Consider what information you've already gathered
+- Determine if you have enough to complete the original request
+- Plan logical next steps that build on previous work
+- ONLY use tools from the available tools list above with correct parameters
+
+You have three choices for the 'decision' key in your JSON response:
+
+1.  **"continue"**: If the task is not yet complete and you need to perform another action.
+    *   **"comment"**: Brief explanation of why you're continuing and what you plan to do next
+    *   **"next_action"**: A dictionary containing the next tool to use and the arguments:
+        *   **"thought"**: What you're trying to accomplish with this action
+        *   **"current_goal"**: The UPDATED current goal for this next step
+        *   **"tool"**: The tool name to use (MUST be from available tools above)
+        *   **"args"**: The arguments for the tool (MUST match tool schema)
+        *   **"is_critical"**: Risk assessment (true for write_file, destructive commands; false for read operations)
+        *   **"workspace_reasoning"**: How this action builds on workspace knowledge
+
+2.  **"finish"**: If the task is complete and you have the final answer for the user.
+    *   **"comment"**: The final answer for the user, incorporating all workspace knowledge
+
+3.  **"error"**: If the last action resulted in an error that you cannot recover from.
+    *   **"comment"**: A brief explanation of the error
+
+**Example Continue with Workspace Awareness:**
+{_EXAMPLE_CONTINUE}
+
+**Example Finish:**
+{_EXAMPLE_FINISH}
+"""
+
+
+# Prompt size budget: only the most recent messages and knowledge entries are embedded.
+# Older turns are still represented by the workspace's task, goal and action history.
+_HISTORY_WINDOW = 12
+_KNOWLEDGE_WINDOW = 8
+
+
+def format_history_line(msg: dict) -> str:
+    """Render a single conversation message the way the prompts embed history."""
+    return f"{msg['role']}: {msg['content']}"
+
+
+def format_history_window(recent_lines: List[str], total_messages: int) -> str:
+    """Join already formatted recent history lines, noting how many older messages were left out."""
+    omitted = total_messages - len(recent_lines)
+    history_str = "\n".join(recent_lines)
+    if omitted > 0:
+        return f"[{omitted} earlier messages omitted]\n{history_str}"
+    return history_str
+
+
+def format_history(history: list) -> str:
+    """Render the last _HISTORY_WINDOW conversation messages as prompt text."""
+    recent_lines = [format_history_line(msg) for msg in history[-_HISTORY_WINDOW:]]
+    return format_history_window(recent_lines, len(history))
+
+
+def recent_knowledge(workspace: TaskWorkspace, limit: int = _KNOWLEDGE_WINDOW) -> list:
+    """The most recently updated knowledge entries, oldest first."""
+    return list(islice(reversed(workspace.accumulated_knowledge.items()), limit))[::-1]
 
 
 def get_workspace_aware_need_assessment_prompt(
@@ -17,26 +170,30 @@ def get_workspace_aware_need_assessment_prompt(
     current_working_directory: str, 
     recalled_memories: list, 
     voice_input_enabled: bool,
-    workspace: Optional[TaskWorkspace] = None
+    workspace: Optional[TaskWorkspace] = None,
+    precomputed_history_str: Optional[str] = None
 ) -> str:
     """
     Enhanced Phase 1 prompt that includes workspace context to prevent redundant actions.
     """
-    history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history])
+    if precomputed_history_str is not None:
+        history_str = precomputed_history_str
+    else:
+        history_str = format_history(history)
     
     persona = "You are voice enabled." if voice_input_enabled else "You are text-based."
     
     memory_context = ""
     if recalled_memories:
-        memory_context = "\n**Recalled Memories:**\n"
-        for memory in recalled_memories:
-            memory_context += f"- {memory}\n"
+        memory_parts = ["\n**Recalled Memories:**\n"]
+        memory_parts.extend(f"- {memory}\n" for memory in recalled_memories)
+        memory_context = "".join(memory_parts)
 
     # Add workspace context to prevent redundant actions
     workspace_context = ""
     redundancy_check = ""
     if workspace:
-        workspace_context = f"""
+        context_parts = [f"""
 **Task Workspace Context:**
 Task: {workspace.original_request}
 Current Goal: {workspace.current_goal}
@@ -44,15 +201,17 @@ Actions Taken: {len(workspace.actions_taken)}
 Status: {workspace.progress_state}
 
 Accumulated Knowledge:
-"""
-        for key, value in workspace.accumulated_knowledge.items():
-            workspace_context += f"  {key}: {value}\n"
+"""]
+        context_parts.extend(f"  {key}: {value}\n" for key, value in recent_knowledge(workspace))
 
         # Recent actions summary
         if workspace.actions_taken:
-            workspace_context += "\nRecent Actions:\n"
-            for action in workspace.actions_taken[-3:]:  # Last 3 actions
-                workspace_context += f"  - {action.tool}({action.args}) -> {action.thought}\n"
+            context_parts.append("\nRecent Actions:\n")
+            context_parts.extend(
+                f"  - {action.tool}({action.args}) -> {action.thought}\n"
+                for action in workspace.actions_taken[-3:]  # Last 3 actions
+            )
+        workspace_context = "".join(context_parts)
 
         redundancy_check = """
 **CRITICAL - AVOID REDUNDANCY:**
@@ -86,13 +245,13 @@ Your task is to determine if the current user request requires tools to complete
 **Response Format (JSON only):**
 
 For requests that can be answered directly:
-{json.dumps({"needs_tools": False, "reasoning": "The workspace already contains a list of files from previous list_directory action", "response": "Based on the directory listing I performed earlier, the assets/images folder contains 15 image files including cats, dogs, and landscapes."})}
+{_EXAMPLE_NEED_TOOLS_FALSE}
 
 For simple questions or greetings:
-{json.dumps({"needs_tools": False, "reasoning": "This is a greeting that requires no system interaction", "response": "Hello! How can I help you today?"})}
+{_EXAMPLE_GREETING}
 
 For requests requiring tools:
-{json.dumps({"needs_tools": True, "reasoning": "User wants to analyze image content, which requires the describe_image tool", "response": ""})}
+{_EXAMPLE_NEED_TOOLS_TRUE}
 
 Analyze the request considering workspace context and respond with appropriate JSON.
 """
@@ -103,18 +262,38 @@ def get_workspace_aware_tool_selection_prompt(
     current_working_directory: str, 
     original_user_request: str, 
     voice_input_enabled: bool,
-    workspace: Optional[TaskWorkspace] = None
+    workspace: Optional[TaskWorkspace] = None,
+    precomputed_history_str: Optional[str] = None
 ) -> str:
     """
     Enhanced Phase 2 prompt that includes workspace context for intelligent tool selection.
     """
-    history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history])
+    if precomputed_history_str is not None:
+        history_str = precomputed_history_str
+    else:
+        history_str = format_history(history)
     
+    key = (
+        "tool_selection", history_str, current_working_directory, original_user_request, voice_input_enabled,
+        workspace.task_id if workspace else None, workspace.version if workspace else None
+    )
+    return _memoized_prompt(key, lambda: _build_tool_selection_prompt(
+        history_str, current_working_directory, original_user_request, voice_input_enabled, workspace
+    ))
+
+
+def _build_tool_selection_prompt(
+    history_str: str,
+    current_working_directory: str,
+    original_user_request: str,
+    voice_input_enabled: bool,
+    workspace: Optional[TaskWorkspace]
+) -> str:
+    """Render the Phase 2 prompt; called only on a _memoized_prompt miss."""
     persona = "You are voice enabled." if voice_input_enabled else "You are text-based."
 
     # Add workspace context
     workspace_context = ""
-    redundancy_check = ""
     if workspace:
         workspace_context = f"""
 **Current Task Workspace:**
@@ -131,50 +310,19 @@ Current Goal: {workspace.current_goal}
 - Only list directories if you haven't done so recently for the same path
 """
 
-    return f"""You are an expert autonomous agent that executes tasks using available tools with workspace awareness.
-
+    # Static instructions first so consecutive turns share an identical prompt prefix
+    return f"""{_TOOL_SELECTION_STATIC_PREFIX}
 {persona}
 
 **Current Working Directory:** {current_working_directory}
-{workspace_context}
 
-**AVAILABLE TOOLS:**
-{json.dumps(tools_schema, indent=2)}
+**Original User Request:**
+{original_user_request}
+{workspace_context}
 
 **Previous Conversation:**
 {history_str}
 
-The user request requires tools to complete. Analyze the available tools and workspace context to determine:
-1. Can you complete this task with the available tools?
-2. What is the logical first/next action based on workspace history?
-3. Are you avoiding redundant actions?
-
-If you CAN complete the task, respond with:
-{{
-    "can_complete": true,
-    "action": {{
-        "thought": "What you're thinking and why this action makes sense given workspace context",
-        "current_goal": "The specific goal for this step",
-        "tool": "tool_name_here",
-        "args": {{"parameter1": "value1", "parameter2": "value2"}},
-        "is_critical": true/false,
-        "original_user_request": "{original_user_request}"
-    }}
-}}
-
-If you CANNOT complete the task, respond with:
-{{
-    "can_complete": false,
-    "reasoning": "Explanation of why the task cannot be completed with available tools",
-    "suggestion": "Alternative approach or request for clarification"
-}}
-
-**Critical Instructions:**
-- ONLY use tools from the available tools list above
-- Use EXACT parameter names as shown in the tools schema
-- Consider workspace context to avoid repeating successful actions
-- Build logically on previous actions and knowledge
-
 Respond with JSON only.
 """
 
@@ -185,21 +333,43 @@ def get_workspace_reflexion_prompt(
     original_user_request: str,
     voice_input_enabled: bool,
     workspace: Optional[TaskWorkspace] = None,
-    relevant_memories: list = None
+    relevant_memories: list = None,
+    precomputed_history_str: Optional[str] = None
 ) -> str:
     """
     Enhanced reflexion prompt with workspace awareness and tools schema.
     """
-    history_str = "\n".join([f"{msg['role']}: {msg['content']}" for msg in history])
-    
-    persona = "You are voice enabled." if voice_input_enabled else "You are text-based."
+    if precomputed_history_str is not None:
+        history_str = precomputed_history_str
+    else:
+        history_str = format_history(history)
     
     memory_context = ""
     if relevant_memories:
-        memory_context = "\n**Relevant Past Experiences:**\n"
-        for i, memory in enumerate(relevant_memories[:3], 1):
-            memory_context += f"{i}. {memory}\n"
-        memory_context += "\nUse these past experiences to inform your decision-making and avoid repeating mistakes.\n"
+        memory_parts = ["\n**Relevant Past Experiences:**\n"]
+        memory_parts.extend(f"{i}. {memory}\n" for i, memory in enumerate(relevant_memories[:3], 1))
+        memory_parts.append("\nUse these past experiences to inform your decision-making and avoid repeating mistakes.\n")
+        memory_context = "".join(memory_parts)
+
+    key = (
+        "reflexion", history_str, current_goal, original_user_request, voice_input_enabled, memory_context,
+        workspace.task_id if workspace else None, workspace.version if workspace else None
+    )
+    return _memoized_prompt(key, lambda: _build_reflexion_prompt(
+        history_str, current_goal, original_user_request, voice_input_enabled, memory_context, workspace
+    ))
+
+
+def _build_reflexion_prompt(
+    history_str: str,
+    current_goal: str,
+    original_user_request: str,
+    voice_input_enabled: bool,
+    memory_context: str,
+    workspace: Optional[TaskWorkspace]
+) -> str:
+    """Render the reflexion prompt; called only on a _memoized_prompt miss."""
+    persona = "You are voice enabled." if voice_input_enabled else "You are text-based."
 
     # Add workspace context
     workspace_context = ""
@@ -207,7 +377,7 @@ def get_workspace_reflexion_prompt(
     if workspace:
         workspace_context = f"""
 **Task Workspace:**
-{workspace.get_progress_summary()}
+{workspace.get_progress_summary(max_knowledge_items=_KNOWLEDGE_WINDOW)}
 
 **Action History:**
 {workspace.get_action_history_summary()}
@@ -220,8 +390,8 @@ def get_workspace_reflexion_prompt(
 - Avoid repeating actions that have already been successful
 """
 
-    return f"""You are a ReAct-style agent. You have just performed an action and observed the result.
-
+    # Static instructions first so consecutive turns share an identical prompt prefix
+    return f"""{_REFLEXION_STATIC_PREFIX}
 {persona}
 
 **Current Goal:**
@@ -232,59 +402,9 @@ def get_workspace_reflexion_prompt(
 {memory_context}
 {workspace_context}
 
-**AVAILABLE TOOLS:**
-{json.dumps(tools_schema, indent=2)}
-
 **Conversation History:**
 {history_str}
 {progress_analysis}
 
-Your task is to analyze the observation and workspace context to decide whether the user request has been fulfilled or if further action is needed.
-
-**WORKSPACE-AWARE DECISION MAKING:**
-- Review the workspace to understand overall progress
-- Consider what information you've already gathered
-- Determine if you have enough to complete the original request
-- Plan logical next steps that build on previous work
-- ONLY use tools from the available tools list above with correct parameters
-
-You have three choices for the 'decision' key in your JSON response:
-
-1.  **"continue"**: If the task is not yet complete and you need to perform another action.
-    *   **"comment"**: Brief explanation of why you're continuing and what you plan to do next
-    *   **"next_action"**: A dictionary containing the next tool to use and the arguments:
-        *   **"thought"**: What you're trying to accomplish with this action
-        *   **"current_goal"**: The UPDATED current goal for this next step
-        *   **"tool"**: The tool name to use (MUST be from available tools above)
-        *   **"args"**: The arguments for the tool (MUST match tool schema)
-        *   **"is_critical"**: Risk assessment (true for write_file, destructive commands; false for read operations)
-        *   **"workspace_reasoning"**: How this action builds on workspace knowledge
-
-2.  **"finish"**: If the task is complete and you have the final answer for the user.
-    *   **"comment"**: The final answer for the user, incorporating all workspace knowledge
-
-3.  **"error"**: If the last action resulted in an error that you cannot recover from.
-    *   **"comment"**: A brief explanation of the error
-
-**Example Continue with Workspace Awareness:**
-{json.dumps({
-    "decision": "continue",
-    "comment": "I have the file list from the previous action. Now I need to analyze the first image to determine sorting categories.",
-    "next_action": {
-        "thought": "Analyze the first image to identify its content for creating sorting categories",
-        "current_goal": "Determine image content categories for sorting the assets/images files",
-        "tool": "describe_image",
-        "args": {"image_path": "assets/images/first_image.jpg", "question": "What animal or object is shown in this image?"},
-        "is_critical": False,
-        "workspace_reasoning": "Building on the file list obtained earlier, now categorizing images by content"
-    }
-})}
-
-**Example Finish:**
-{json.dumps({
-    "decision": "finish",
-    "comment": "I have successfully analyzed all images and sorted them into categories: Animals (deer, giraffe, fox), Landscapes (3 files), and Objects (2 files). The images are now organized by their primary content."
-})}
-
 Now, analyze the conversation history and workspace context and generate the appropriate JSON response.
 """
@@ -0,0 +1,59 @@
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# Tests import `src.cli_ai...`; keep the project root importable once the
+# fixture below moves the working directory away from it
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Exact (brute-force) FAISS search so recall results are deterministic; read when
+# the database module is imported, so it must be set before the tests import it
+os.environ.setdefault("FAISS_INDEX_KIND", "flat")
+# Embed on CPU unless told otherwise, so results do not depend on the host's GPU
+os.environ.setdefault("CLI_AI_EMBED_DEVICE", "cpu")
+
+# Keep the SQLite memory database on tmpfs (one per worker process) so the many small
+# inserts never wait on disk; like FAISS_INDEX_KIND this is read at import time
+if "CLI_AI_DB" not in os.environ:
+    _db_dir = tempfile.mkdtemp(prefix="cli_ai_db_", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+    atexit.register(shutil.rmtree, _db_dir, ignore_errors=True)
+    os.environ["CLI_AI_DB"] = os.path.join(_db_dir, "agent_memory.db")
+
+
+@pytest.fixture(autouse=True, scope="session")
+def isolated_worker_dir(tmp_path_factory):
+    """
+    Run each pytest-xdist worker in its own scratch directory.
+
+    Task workspaces (./workspaces) and any other relative paths are opened
+    against the current directory, so parallel workers sharing one cwd would
+    clobber each other's state.
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    worker_dir = tmp_path_factory.mktemp(f"run_{worker}")
+    previous_dir = os.getcwd()
+    os.chdir(worker_dir)
+    try:
+        yield worker_dir
+    finally:
+        os.chdir(previous_dir)
+
+
+@pytest.fixture(scope="session")
+def vector_memory(isolated_worker_dir):
+    """One VectorMemoryManager (and embedding model) shared by every test in the session."""
+    from src.cli_ai.memory import VectorMemoryManager
+    return VectorMemoryManager()
+
+
+@pytest.fixture
+def session_memory():
+    """A fresh, small session window per test so overflow is exercised quickly."""
+    from src.cli_ai.memory import SessionMemoryManager
+    return SessionMemoryManager(max_recent_length=6)
@@ -0,0 +1,85 @@
+import sqlite3
+import time
+
+from src.cli_ai.utils import embeddings
+from src.cli_ai.utils.embeddings import EmbeddingCache
+
+
+def _rows(path):
+    conn = sqlite3.connect(path)
+    count = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_round_trip(tmp_path):
+    cache = EmbeddingCache("model", str(tmp_path / "cache.db"))
+    cache.put("a", b"\x01")
+    cache.put_many({"b": b"\x02", "c": b"\x03"})
+
+    assert cache.get("a") == b"\x01"
+    assert cache.get_many(["a", "b", "missing"]) == {"a": b"\x01", "b": b"\x02"}
+    assert cache.get("missing") is None
+    cache.close()
+
+
+def test_rows_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(embeddings, "EMBEDDING_CACHE_MAX_ROWS", 10)
+    monkeypatch.setattr(embeddings, "_PRUNE_EVERY", 5)
+    path = str(tmp_path / "cache.db")
+    cache = EmbeddingCache("model", path)
+
+    for i in range(40):
+        cache.put(f"text {i}", b"\x00")
+
+    assert _rows(path) <= 10 + 5
+    assert cache.get("text 39") == b"\x00"
+    assert cache.get("text 0") is None
+    cache.close()
+
+
+def test_expired_rows_are_ignored_and_pruned(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = EmbeddingCache("model", path)
+    cache.put("old", b"\x00")
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE embeddings SET created_at = ?", (time.time() - 365 * 86400,))
+    conn.commit()
+    conn.close()
+
+    assert cache.get("old") is None
+    cache.close()
+    EmbeddingCache("model", path).close()  # Pruned on open
+    assert _rows(path) == 0
+
+
+def test_caches_written_before_rows_were_dated_are_kept(tmp_path):
+    path = str(tmp_path / "cache.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE embeddings (
+            text_hash TEXT NOT NULL, model TEXT NOT NULL, embedding BLOB NOT NULL,
+            PRIMARY KEY (text_hash, model)
+        )
+    """)
+    conn.execute("INSERT INTO embeddings VALUES (?, ?, ?)", (EmbeddingCache._key("legacy"), "model", b"\x07"))
+    conn.commit()
+    conn.close()
+
+    cache = EmbeddingCache("model", path)
+    assert cache.get("legacy") == b"\x07"
+    cache.close()
+
+
+def test_new_version_of_a_source_replaces_its_old_rows(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = EmbeddingCache("model", path)
+    cache.put_many({"/img/cat.jpg\x001": b"\x01", "/img/dog.jpg\x001": b"\x02"},
+                   {"/img/cat.jpg\x001": "/img/cat.jpg", "/img/dog.jpg\x001": "/img/dog.jpg"})
+    cache.put_many({"/img/cat.jpg\x002": b"\x03"}, {"/img/cat.jpg\x002": "/img/cat.jpg"})
+
+    assert cache.get("/img/cat.jpg\x001") is None
+    assert cache.get("/img/cat.jpg\x002") == b"\x03"
+    assert cache.get("/img/dog.jpg\x001") == b"\x02"
+    assert _rows(path) == 2
+    cache.close()
@@ -0,0 +1,42 @@
+from src.cli_ai.tools.executor import is_critical_action
+
+
+def test_batch_with_write_file_is_critical():
+    args = {"calls": [
+        {"name": "read_file", "args": {"file_path": "a.txt"}},
+        {"name": "write_file", "args": {"file_path": "b.txt", "content": "x"}},
+    ]}
+    assert is_critical_action("batch", args, is_critical=False)
+
+
+def test_batch_with_shell_command_is_critical():
+    args = {"calls": [{"name": "run_shell_command", "args": {"command": "rm -rf build"}}]}
+    assert is_critical_action("batch", args, is_critical=False)
+
+
+def test_read_only_batch_is_not_critical():
+    args = {"calls": [
+        {"name": "read_file", "args": {"file_path": "a.txt"}},
+        {"name": "list_directory", "args": {"path": "."}},
+    ]}
+    assert not is_critical_action("batch", args, is_critical=False)
+
+
+def test_model_flag_is_respected():
+    assert is_critical_action("write_file", {"file_path": "a.txt", "content": ""}, is_critical=True)
+    assert not is_critical_action("read_file", {"file_path": "a.txt"}, is_critical=False)
+
+
+def test_malformed_batch_is_not_critical():
+    assert not is_critical_action("batch", {"calls": "write_file"})
+    assert not is_critical_action("batch", {})
+
+
+def test_shell_syntax_commands_are_critical():
+    for command in ["ls; rm -rf build", "make && make install", "echo $(whoami)", "echo `id`", "ls > out.txt", "cat a | sh"]:
+        assert is_critical_action("run_shell_command", {"command": command}, is_critical=False), command
+
+
+def test_plain_commands_are_not_critical():
+    for command in ["ls -la", "git status", ["ls", "-la; rm -rf /"], "grep -n 'a b' file.txt"]:
+        assert not is_critical_action("run_shell_command", {"command": command}, is_critical=False), command
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import sqlite3
+from types import SimpleNamespace
+
+from src.cli_ai.memory import userinfo_manager
+from src.cli_ai.memory.userinfo_manager import UserInfoManager
+
+
+class _FakeCompletions:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        content = json.dumps({"extractions": self.replies.pop(0)})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _use_replies(monkeypatch, replies):
+    completions = _FakeCompletions(replies)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(userinfo_manager, "_get_client", lambda: client)
+    return completions
+
+
+def _rows(manager):
+    conn = sqlite3.connect(manager.db_path)
+    count = conn.execute("SELECT COUNT(*) FROM user_info_extraction_cache").fetchone()[0]
+    conn.close()
+    return count
+
+
+NAME = {"category": "fact", "key": "name", "value": "Sam", "confidence": 0.9}
+
+
+def test_extractions_are_cached(tmp_path, monkeypatch):
+    manager = UserInfoManager(str(tmp_path / "memory.db"))
+    completions = _use_replies(monkeypatch, [[NAME]])
+
+    first = asyncio.run(manager._analyze_user_content("My name is Sam"))
+    second = asyncio.run(manager._analyze_user_content("My name is Sam"))
+
+    assert [info.value for info in first] == [info.value for info in second] == ["Sam"]
+    assert completions.calls == 1
+
+
+def test_empty_extractions_are_retried(tmp_path, monkeypatch):
+    manager = UserInfoManager(str(tmp_path / "memory.db"))
+    completions = _use_replies(monkeypatch, [[], [NAME]])
+
+    assert asyncio.run(manager._analyze_user_content("My name is Sam")) == []
+    assert [info.value for info in asyncio.run(manager._analyze_user_content("My name is Sam"))] == ["Sam"]
+    assert completions.calls == 2
+
+
+def test_cache_is_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(userinfo_manager, "EXTRACTION_CACHE_MAX_ROWS", 3)
+    manager = UserInfoManager(str(tmp_path / "memory.db"))
+
+    for i in range(5):
+        manager._cache_extractions(f"hash-{i}", [NAME])
+
+    assert _rows(manager) == 3
+    assert manager._get_cached_extractions("hash-0") is None
+    assert manager._get_cached_extractions("hash-4") == [NAME]
+
+
+def test_expired_rows_are_ignored_and_pruned(tmp_path):
+    manager = UserInfoManager(str(tmp_path / "memory.db"))
+    manager._cache_extractions("old", [NAME])
+    conn = sqlite3.connect(manager.db_path)
+    conn.execute("UPDATE user_info_extraction_cache SET created_at = datetime('now', '-365 days')")
+    conn.commit()
+    conn.close()
+
+    assert manager._get_cached_extractions("old") is None
+    manager._cache_extractions("new", [NAME])
+    assert _rows(manager) == 1
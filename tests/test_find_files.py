@@ -0,0 +1,68 @@
+import os
+
+from src.cli_ai.tools.tools import find_files
+
+
+def _touch(path, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_prunes_hidden_and_cache_directories_by_default(tmp_path):
+    kept = _touch(tmp_path / "src" / "app.py")
+    _touch(tmp_path / ".git" / "hook.py")
+    _touch(tmp_path / "node_modules" / "pkg" / "index.py")
+    _touch(tmp_path / "__pycache__" / "app.py")
+    _touch(tmp_path / ".hidden" / "secret.py")
+
+    assert find_files("*.py", str(tmp_path)) == {"result": [kept]}
+
+
+def test_empty_exclude_searches_everything(tmp_path):
+    expected = {
+        _touch(tmp_path / "app.py"),
+        _touch(tmp_path / ".git" / "hook.py"),
+        _touch(tmp_path / "node_modules" / "index.py"),
+    }
+
+    assert set(find_files("*.py", str(tmp_path), exclude=[])["result"]) == expected
+
+
+def test_exclude_names_only_those_directories(tmp_path):
+    kept = _touch(tmp_path / ".config" / "settings.py")
+    _touch(tmp_path / "build" / "generated.py")
+
+    assert find_files("*.py", str(tmp_path), exclude=["build"]) == {"result": [kept]}
+
+
+def test_brace_pattern_matches_each_alternative(tmp_path):
+    expected = {_touch(tmp_path / "a.py"), _touch(tmp_path / "docs" / "b.md")}
+    _touch(tmp_path / "c.txt")
+
+    assert set(find_files("*.{py,md}", str(tmp_path))["result"]) == expected
+
+
+def test_results_are_newest_first(tmp_path):
+    oldest = _touch(tmp_path / "old.py", mtime=1_000_000)
+    newest = _touch(tmp_path / "sub" / "new.py", mtime=3_000_000)
+    middle = _touch(tmp_path / "mid.py", mtime=2_000_000)
+
+    assert find_files("*.py", str(tmp_path)) == {"result": [newest, middle, oldest]}
+
+
+def test_broken_symlink_does_not_fail_the_search(tmp_path):
+    real = _touch(tmp_path / "a.py")
+    broken = tmp_path / "b.py"
+    broken.symlink_to(tmp_path / "missing.py")
+
+    result = find_files("*.py", str(tmp_path))
+
+    assert "error" not in result
+    assert set(result["result"]) == {real, str(broken)}
+
+
+def test_missing_directory_is_an_error(tmp_path):
+    assert "error" in find_files("*.py", str(tmp_path / "nope"))
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+
+from src.cli_ai.utils import database as db
+
+
+def _embedding(seed, dim=db.EMBEDDING_DIM):
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32).tobytes()
+
+
+def _fresh_db(monkeypatch, tmp_path):
+    monkeypatch.setattr(db, "DB_FILE", str(tmp_path / "memory.db"))
+    monkeypatch.setattr(db, "FAISS_INDEX", None)
+    monkeypatch.setattr(db, "_unflushed_adds", 0)
+
+
+def test_saves_do_not_rewrite_the_index(monkeypatch, tmp_path):
+    _fresh_db(monkeypatch, tmp_path)
+    db.initialize_db()
+    index_file, _ = db._index_paths()
+    written = os.stat(index_file).st_mtime_ns
+
+    for i in range(100):
+        db.save_memory(f"memory {i}", _embedding(i))
+
+    assert os.stat(index_file).st_mtime_ns == written
+    assert db._unflushed_adds == 100
+
+
+def test_persisted_index_survives_wrong_dimension_rows(monkeypatch, tmp_path, capsys):
+    _fresh_db(monkeypatch, tmp_path)
+    db.initialize_db()
+    db.save_memory("good", _embedding(1))
+    db.save_memory("wrong dimension", _embedding(2, dim=db.EMBEDDING_DIM // 2))
+    db.save_memories(["batched", "no embedding"], [_embedding(3), None])
+    db.flush_pending_index()
+
+    monkeypatch.setattr(db, "FAISS_INDEX", None)
+    capsys.readouterr()
+    db.initialize_db()
+
+    assert "loaded with 2 embeddings" in capsys.readouterr().out
+    assert db.FAISS_INDEX.covered_rows == 3
+
+
+def test_rows_added_behind_the_index_force_a_rebuild(monkeypatch, tmp_path, capsys):
+    _fresh_db(monkeypatch, tmp_path)
+    db.initialize_db()
+    db.save_memory("indexed", _embedding(1))
+    db.flush_pending_index()
+
+    # Written straight to the table, as if the process died before flushing
+    conn = db.get_db_connection()
+    conn.execute("INSERT INTO memories (content, embedding) VALUES (?, ?)", ("unflushed", _embedding(2)))
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(db, "FAISS_INDEX", None)
+    capsys.readouterr()
+    db.initialize_db()
+
+    assert "built with 2 embeddings" in capsys.readouterr().out
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from src.cli_ai.tools import tools
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Tiny scan chunks so line breaks, CRLF pairs included, land on chunk boundaries
+    monkeypatch.setattr(tools, "_LINE_INDEX_CHUNK", 7)
+    monkeypatch.setattr(tools, "_line_index", {})
+
+
+def _write(tmp_path, newline):
+    path = tmp_path / "lines.txt"
+    # Varying line lengths so every boundary offset within a chunk occurs
+    path.write_bytes(newline.join(f"line {i} " + "x" * (i % 9) for i in range(60)).encode() + newline.encode())
+    return str(path)
+
+
+def _expected(path, offset, limit):
+    with open(path, encoding="utf-8") as f:
+        return f.readlines()[offset:offset + limit]
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+def test_slices_match_readlines(tmp_path, newline):
+    path = _write(tmp_path, newline)
+    # Ascending, then jumping back, so both fresh scans and indexed lookups are compared
+    for offset in [0, 1, 2, 5, 13, 14, 30, 59, 60, 75, 3, 20, 0]:
+        for limit in (1, 4, 100):
+            assert tools._read_line_slice(path, offset, limit) == _expected(path, offset, limit)
+
+
+def test_crlf_split_across_chunks_keeps_the_index(tmp_path):
+    path = tmp_path / "crlf.txt"
+    # "abcdef\r" fills the first 7-byte chunk exactly; its "\n" starts the next one
+    path.write_bytes(b"abcdef\r\nsecond\r\nthird\r\n")
+
+    assert tools._read_line_slice(str(path), 2, 1) == ["third\n"]
+    assert tools._line_index[os.path.abspath(path)]["lines"] is not None
+
+
+def test_lone_cr_disables_the_index(tmp_path):
+    path = tmp_path / "mixed.txt"
+    path.write_bytes(b"one\ntwo\rthree\nfour\n")
+
+    assert tools._read_line_slice(str(path), 2, 2) == ["three\n", "four\n"]
+    assert tools._line_index[os.path.abspath(path)]["lines"] is None
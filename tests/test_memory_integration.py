@@ -13,7 +13,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from src.cli_ai.memory import SessionMemoryManager, VectorMemoryManager
 
-def test_memory_integration():
+def test_memory_integration(session_memory, vector_memory):
     """Test the complete memory integration system."""
     init(autoreset=True)
     
@@ -21,10 +21,6 @@ def test_memory_integration():
     print(Fore.CYAN + "  SMART MEMORY SYSTEM INTEGRATION TEST")
     print(Fore.CYAN + "=" * 60)
     
-    # Initialize managers
-    session_memory = SessionMemoryManager(max_recent_length=6)  # Small limit for testing
-    vector_memory = VectorMemoryManager()
-    
     print(f"{Fore.GREEN}✓ Session Memory: Max {session_memory.max_recent_length} messages")
     print(f"{Fore.GREEN}✓ Vector Memory: Connected to database")
     print()
@@ -59,8 +55,7 @@ def test_memory_integration():
                 if overflow_count % 2 != 0:
                     overflow_count += 1
                 
-                overflow_messages = session_memory.recent_messages[:overflow_count]
-                session_memory.recent_messages = session_memory.recent_messages[overflow_count:]
+                overflow_messages = session_memory.pop_oldest(overflow_count)
                 
                 if overflow_messages:
                     success = vector_memory.store_conversation_chunk(overflow_messages, {
@@ -100,4 +95,4 @@ def test_memory_integration():
     print(Fore.CYAN + "=" * 60)
 
 if __name__ == "__main__":
-    test_memory_integration()
+    test_memory_integration(SessionMemoryManager(max_recent_length=6), VectorMemoryManager())
@@ -0,0 +1,93 @@
+import os
+import time
+
+import pytest
+
+from src.cli_ai.tools.tools import _PIPE_CHUNK_BYTES, _PersistentShell
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="the persistent shell is POSIX-only")
+
+
+@pytest.fixture
+def shell():
+    shell = _PersistentShell()
+    yield shell
+    if shell.process is not None:
+        shell.process.kill()
+        shell.process.wait()
+
+
+def test_reports_exit_code(shell):
+    assert shell.run("true", None)["result"]["exit_code"] == 0
+    assert shell.run("sh -c 'exit 7'", None)["result"]["exit_code"] == 7
+    assert shell.run("false || echo recovered", None)["result"] == {
+        "stdout": "recovered\n", "stderr": "", "exit_code": 0, "truncated": False
+    }
+
+
+def test_output_containing_a_partial_marker(shell):
+    start, end = shell.start.decode(), shell.end.decode()
+    # The marker's opening half and a dangling separator byte, but never a full trailer
+    text = f"a{start}b\x1e{end[:-1]}c"
+    result = shell.run(f"printf '%s' '{text}'; printf '%s' '{start}' >&2", None)["result"]
+    assert result["stdout"] == text
+    assert result["stderr"] == start
+    assert result["exit_code"] == 0
+
+
+@pytest.mark.parametrize("size", [
+    _PIPE_CHUNK_BYTES - 1, _PIPE_CHUNK_BYTES, _PIPE_CHUNK_BYTES + 1,
+    _PIPE_CHUNK_BYTES - 40, 3 * _PIPE_CHUNK_BYTES + 17,
+])
+def test_output_straddling_chunk_boundaries(shell, size):
+    result = shell.run(f"head -c {size} /dev/zero | tr '\\0' x", None)["result"]
+    assert result["stdout"] == "x" * size
+    assert result["exit_code"] == 0
+
+
+# `exit` only leaves the per-command subshell; `kill $$` takes down the shell itself,
+# whose status is then reported as the signal (Popen's negative returncode)
+@pytest.mark.parametrize("command, exit_code", [("exit 3", 3), ("kill $$", -15)])
+def test_shell_exiting_is_reported_and_respawned(shell, command, exit_code):
+    assert shell.run(command, None)["result"]["exit_code"] == exit_code
+    follow_up = shell.run("echo alive", None)["result"]
+    assert follow_up["stdout"] == "alive\n"
+    assert follow_up["exit_code"] == 0
+
+
+def test_cd_and_export_do_not_leak(shell, tmp_path):
+    other = tmp_path / "other"
+    other.mkdir()
+    shell.run(f"cd '{other}' && export CLI_AI_LEAK=1 && LOCAL_VAR=2", str(tmp_path))
+    # No directory this time, so a leaked cd would show up in pwd
+    result = shell.run('pwd -P; echo "[$CLI_AI_LEAK][$LOCAL_VAR]"', None)["result"]
+    assert result["stdout"] == f"{os.path.realpath(os.getcwd())}\n[][]\n"
+
+
+def test_syntax_error_does_not_break_the_shell(shell):
+    assert shell.run("if then fi (", None)["result"]["exit_code"] != 0
+    assert shell.run("echo ok", None)["result"]["stdout"] == "ok\n"
+
+
+def test_stderr_only_output(shell):
+    result = shell.run("echo oops >&2; exit 2", None)["result"]
+    assert result == {"stdout": "", "stderr": "oops\n", "exit_code": 2, "truncated": False}
+
+
+def test_background_jobs_do_not_leak_into_the_next_result(shell):
+    first = shell.run("(sleep 0.3; echo LATE) & echo now", None)["result"]
+    assert first["stdout"] == "now\n"
+    time.sleep(0.5)
+    assert shell.run("echo next", None)["result"]["stdout"] == "next\n"
+
+
+def test_command_past_the_timeout_is_killed_and_the_shell_respawned(shell):
+    started = time.monotonic()
+    result = shell.run("echo partial; sleep 30", None, timeout=0.5)["result"]
+    assert time.monotonic() - started < 5
+    assert result["stdout"] == "partial\n"
+    assert result["exit_code"] != 0
+    assert "timed out" in result["stderr"]
+
+    follow_up = shell.run("echo alive", None)["result"]
+    assert follow_up == {"stdout": "alive\n", "stderr": "", "exit_code": 0, "truncated": False}
@@ -6,16 +6,15 @@ Tests how the system handles conflicting information over time.
 
 import os
 import sys
-import time
 from datetime import datetime, timedelta
 from colorama import Fore, Style, init
 
 # Add the project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.cli_ai.memory import SessionMemoryManager, VectorMemoryManager
+from src.cli_ai.memory import Message, SessionMemoryManager, VectorMemoryManager
 
-def test_temporal_precedence():
+def test_temporal_precedence(session_memory, vector_memory):
     """Test temporal precedence with conflicting preferences."""
     init(autoreset=True)
     
@@ -23,10 +22,6 @@ def test_temporal_precedence():
     print(Fore.CYAN + "  TEMPORAL PRECEDENCE TEST")
     print(Fore.CYAN + "=" * 60)
     
-    # Initialize managers
-    session_memory = SessionMemoryManager(max_recent_length=6)
-    vector_memory = VectorMemoryManager()
-    
     print(f"{Fore.GREEN}✓ Session Memory: Max {session_memory.max_recent_length} messages")
     print(f"{Fore.GREEN}✓ Vector Memory: Connected with temporal precedence")
     print()
@@ -35,8 +30,8 @@ def test_temporal_precedence():
     print(Fore.YELLOW + "Simulating OLDER conversation (I like Friday)...")
     older_time = datetime.now() - timedelta(days=1)  # Yesterday
     older_messages = [
-        {"role": "user", "content": "I love Fridays the most", "timestamp": older_time, "session_id": "old_session"},
-        {"role": "assistant", "content": "Great to know you love Fridays! I'll remember that.", "timestamp": older_time, "session_id": "old_session"}
+        Message("user", "I love Fridays the most", older_time, "old_session"),
+        Message("assistant", "Great to know you love Fridays! I'll remember that.", older_time, "old_session")
     ]
     
     success = vector_memory.store_conversation_chunk(older_messages, {
@@ -45,15 +40,12 @@ def test_temporal_precedence():
     })
     print(f"  {Fore.GREEN if success else Fore.RED}Stored older preference: {success}")
     
-    # Wait a moment to ensure timestamp difference
-    time.sleep(2)
-    
     # Simulate newer preference  
     print(Fore.YELLOW + "Simulating NEWER conversation (I like Sunday)...")
     newer_time = datetime.now()  # Now
     newer_messages = [
-        {"role": "user", "content": "Actually, I prefer Sundays now", "timestamp": newer_time, "session_id": "new_session"},
-        {"role": "assistant", "content": "Thanks for the update! I'll remember you prefer Sundays.", "timestamp": newer_time, "session_id": "new_session"}
+        Message("user", "Actually, I prefer Sundays now", newer_time, "new_session"),
+        Message("assistant", "Thanks for the update! I'll remember you prefer Sundays.", newer_time, "new_session")
     ]
     
     success = vector_memory.store_conversation_chunk(newer_messages, {
@@ -94,4 +86,4 @@ def test_temporal_precedence():
     print(Fore.CYAN + "=" * 60)
 
 if __name__ == "__main__":
-    test_temporal_precedence()
+    test_temporal_precedence(SessionMemoryManager(max_recent_length=6), VectorMemoryManager())
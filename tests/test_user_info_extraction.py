@@ -4,6 +4,7 @@ Test script for UserInfo extraction and modern AI memory patterns.
 Demonstrates how automatic extraction replaces manual save_memory calls.
 """
 
+import asyncio
 import os
 import sys
 from datetime import datetime, timedelta
@@ -12,7 +13,7 @@ from colorama import Fore, Style, init
 # Add the project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.cli_ai.memory import SessionMemoryManager, VectorMemoryManager, UserInfoManager
+from src.cli_ai.memory import Message, SessionMemoryManager, VectorMemoryManager, UserInfoManager
 
 def print_separator(title):
     """Print a visual separator with title."""
@@ -26,7 +27,7 @@ def print_subsection(title):
     print(f"{Fore.YELLOW}{title}")
     print(f"{Fore.YELLOW}{'-' * 60}")
 
-def test_user_info_extraction():
+def test_user_info_extraction(vector_memory):
     """Test automatic user info extraction vs manual save_memory."""
     init(autoreset=True)
     
@@ -36,7 +37,6 @@ def test_user_info_extraction():
     
     # Initialize managers
     session_memory = SessionMemoryManager(max_recent_length=4)
-    vector_memory = VectorMemoryManager()
     user_info = UserInfoManager()
     
     print(f"{Fore.GREEN}✓ Memory systems initialized")
@@ -54,6 +54,7 @@ def test_user_info_extraction():
     print_subsection("SIMULATING NATURAL CONVERSATION")
     
     all_extracted_info = []
+    exchanges = []
     
     for i, (user_msg, ai_msg) in enumerate(conversations):
         print(f"\n{Fore.CYAN}Exchange {i+1}:")
@@ -63,23 +64,11 @@ def test_user_info_extraction():
         # Add to session memory (normal conversation flow)
         session_memory.add_exchange(user_msg, ai_msg)
         
-        # Extract user info from current exchange
-        current_messages = [
-            {"role": "user", "content": user_msg, "timestamp": datetime.now(), "session_id": session_memory.session_id},
-            {"role": "assistant", "content": ai_msg, "timestamp": datetime.now(), "session_id": session_memory.session_id}
-        ]
-        
-        extracted = user_info.extract_user_info_from_conversation(current_messages)
-        
-        if extracted:
-            print(f"  {Fore.GREEN}→ Automatically extracted:")
-            stored_count = user_info.store_user_info(extracted)
-            for info in extracted:
-                print(f"    • {info.category}: {info.key} = {info.value} (confidence: {info.confidence})")
-            print(f"    Stored: {stored_count} items")
-            all_extracted_info.extend(extracted)
-        else:
-            print(f"  {Fore.YELLOW}→ No user info patterns detected")
+        # Collect the exchange; user info is extracted for all exchanges in one batch below
+        exchanges.append([
+            Message("user", user_msg, session_id=session_memory.session_id),
+            Message("assistant", ai_msg, session_id=session_memory.session_id)
+        ])
         
         # Check for session overflow
         if len(session_memory.recent_messages) > session_memory.max_recent_length:
@@ -87,19 +76,30 @@ def test_user_info_extraction():
             if overflow_count % 2 != 0:
                 overflow_count += 1
             
-            overflow_messages = session_memory.recent_messages[:overflow_count]
-            session_memory.recent_messages = session_memory.recent_messages[overflow_count:]
+            overflow_messages = session_memory.pop_oldest(overflow_count)
             
             if overflow_messages:
-                # Extract user info before storing in vector DB
-                extracted_from_overflow = user_info.extract_user_info_from_conversation(overflow_messages)
-                if extracted_from_overflow:
-                    user_info.store_user_info(extracted_from_overflow)
-                
+                # User info from overflowed exchanges is covered by the batch extraction
                 # Store conversation in vector DB
                 vector_memory.store_conversation_chunk(overflow_messages, {"reason": "overflow"})
                 print(f"  {Fore.BLUE}→ {len(overflow_messages)} messages moved to vector storage")
     
+    print_subsection("AUTOMATIC EXTRACTION")
+    
+    # Extract user info from every exchange in a single pass
+    extracted_per_exchange = asyncio.run(user_info.extract_user_info_batch(exchanges))
+    
+    for i, extracted in enumerate(extracted_per_exchange):
+        if extracted:
+            print(f"  {Fore.GREEN}→ Exchange {i+1}, automatically extracted:")
+            stored_count = user_info.store_user_info(extracted)
+            for info in extracted:
+                print(f"    • {info.category}: {info.key} = {info.value} (confidence: {info.confidence})")
+            print(f"    Stored: {stored_count} items")
+            all_extracted_info.extend(extracted)
+        else:
+            print(f"  {Fore.YELLOW}→ Exchange {i+1}: No user info patterns detected")
+    
     print_subsection("EXTRACTED USER INFORMATION")
     
     # Show all extracted user info by category
@@ -154,4 +154,4 @@ def test_user_info_extraction():
     print(f"{Fore.GREEN}✅ Modern AI memory pattern implemented")
 
 if __name__ == "__main__":
-    test_user_info_extraction()
+    test_user_info_extraction(VectorMemoryManager())
@@ -0,0 +1,52 @@
+import gc
+import weakref
+
+from src.cli_ai.workspace.core import TaskWorkspace
+from src.cli_ai.workspace.prompts import get_workspace_aware_tool_selection_prompt, get_workspace_reflexion_prompt
+
+
+def _render(workspace):
+    return (
+        get_workspace_aware_tool_selection_prompt([], "/tmp", "sort my images", False, workspace, ""),
+        get_workspace_reflexion_prompt([], "list images", "sort my images", False, workspace, None, ""),
+    )
+
+
+def test_prompt_caches_do_not_keep_workspaces_alive():
+    workspace = TaskWorkspace(original_request="sort my images")
+    _render(workspace)
+    ref = weakref.ref(workspace)
+
+    del workspace
+    gc.collect()
+
+    assert ref() is None
+
+
+def test_prompts_follow_workspace_changes():
+    workspace = TaskWorkspace(original_request="sort my images")
+    before = _render(workspace)
+    assert _render(workspace) == before
+
+    workspace.current_goal = "group the cat pictures"
+
+    tool_selection, _ = _render(workspace)
+    assert "group the cat pictures" in tool_selection
+
+
+def test_direct_writes_and_reloads_change_the_prompt():
+    workspace = TaskWorkspace(original_request="sort my images")
+    workspace.add_action("list_directory", {"path": "."}, "look around", "list images")
+    before = _render(workspace)
+
+    workspace.actions_taken = []
+    assert "No actions taken yet." in _render(workspace)[0]
+
+    workspace.next_steps = ["describe the first image"]
+    assert "describe the first image" in _render(workspace)[1]
+
+    # A reloaded copy of the same task never shares a version with the original
+    reloaded = TaskWorkspace.from_dict(workspace.to_dict())
+    assert reloaded.task_id == workspace.task_id
+    assert reloaded.version != workspace.version
+    assert _render(reloaded) != before